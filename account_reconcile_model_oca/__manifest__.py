@@ -5,14 +5,17 @@
     "name": "Account Reconcile Model Oca",
     "summary": """
         This includes the logic moved from Odoo Community to Odoo Enterprise""",
-    "version": "18.0.1.1.1",
+    "version": "18.0.1.2.0",
     "license": "LGPL-3",
     "author": "Dixmit,Odoo,Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/account-reconcile",
     "depends": ["account"],
     "excludes": ["account_accountant"],
     "data": [
+        "security/ir.model.access.csv",
         "views/account_reconcile_model_views.xml",
+        "views/account_reconcile_stage_stat_views.xml",
+        "views/account_reconcile_trace_views.xml",
     ],
     "demo": [],
 }
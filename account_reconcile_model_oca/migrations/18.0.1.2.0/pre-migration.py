@@ -0,0 +1,50 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tools.sql import column_exists, create_column
+
+MATCHING_COLUMNS = {
+    "matching_payment_ref": "varchar",
+    "matching_narration": "text",
+    "matching_transaction_type": "varchar",
+}
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # Create and fill the normalized matching texts of the statement lines in
+    # SQL, instead of letting the ORM compute them line by line in Python.
+    # The database unaccent is a bit broader than the Python normalization,
+    # the lines written later are normalized again in Python anyway.
+    new_columns = [
+        column
+        for column in MATCHING_COLUMNS
+        if not column_exists(cr, "account_bank_statement_line", column)
+    ]
+    if not new_columns:
+        return
+    for column in new_columns:
+        create_column(
+            cr, "account_bank_statement_line", column, MATCHING_COLUMNS[column]
+        )
+    cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'unaccent'")
+    unaccent = "unaccent" if cr.rowcount else ""
+    cr.execute(
+        f"""
+        UPDATE account_bank_statement_line st_line
+        SET matching_payment_ref = NULLIF(
+                LOWER({unaccent}(st_line.payment_ref)), ''
+            ),
+            matching_transaction_type = NULLIF(
+                LOWER({unaccent}(st_line.transaction_type)), ''
+            ),
+            matching_narration = NULLIF(
+                BTRIM(LOWER({unaccent}(
+                    REGEXP_REPLACE(move.narration, '<[^>]*>', ' ', 'g')
+                ))),
+                ''
+            )
+        FROM account_move move
+        WHERE move.id = st_line.move_id
+        """
+    )
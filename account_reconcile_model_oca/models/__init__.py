@@ -1,2 +1,5 @@
 from . import account_reconcile_model
 from . import account_bank_statement_line
+from . import account_reconcile_stage_stat
+from . import account_reconcile_trace
+from . import account_move_line
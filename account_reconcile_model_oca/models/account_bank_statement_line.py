@@ -1,15 +1,77 @@
 # Copyright 2023 Dixmit
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from odoo import models
-from odoo.tools import SQL, html2plaintext
+from odoo import api, fields, models
+from odoo.tools import SQL
 
 from odoo.addons.base.models.res_bank import sanitize_account_number
 
+from ..tools import html_to_plaintext, normalize_matching_text
+
 
 class AccountBankStatementLine(models.Model):
     _inherit = "account.bank.statement.line"
 
+    # Lowercased, unaccented and plain text versions of the texts used by the
+    # reconcile models, so that they are not normalized again for each model
+    matching_payment_ref = fields.Char(
+        compute="_compute_matching_texts", store=True, index="trigram"
+    )
+    matching_narration = fields.Text(
+        compute="_compute_matching_texts", store=True, index="trigram"
+    )
+    matching_transaction_type = fields.Char(
+        compute="_compute_matching_texts", store=True, index="trigram"
+    )
+    reconcile_hints = fields.Json(
+        copy=False,
+        help="Matching information given by the importer of the line, see "
+        "_get_reconcile_hints.",
+    )
+
+    @api.depends("payment_ref", "move_id.narration", "transaction_type")
+    def _compute_matching_texts(self):
+        for record in self:
+            record.matching_payment_ref = (
+                normalize_matching_text(record.payment_ref) or False
+            )
+            record.matching_narration = (
+                normalize_matching_text(
+                    html_to_plaintext(record.move_id.narration).strip()
+                )
+                or False
+            )
+            record.matching_transaction_type = (
+                normalize_matching_text(record.transaction_type) or False
+            )
+
+    def _get_reconcile_hints(self):
+        """Return the matching hints given by the importer of the line.
+
+        Importers that already know some matching information can store it in
+        the ``reconcile_hints`` field of the line, or pass it in the
+        ``statement_line_hints`` context key, mapping statement line ids to the
+        hints. The hints are a dict that may contain:
+
+        * ``partner_id``: id of the partner of the line.
+        * ``partner_bank_id``: id of the bank account of the counterpart.
+        * ``invoice_reference``: name or payment reference of the paid move.
+
+        Hints are trusted, so the lookups they answer are not performed.
+        """
+        self.ensure_one()
+        hints = self.env.context.get("statement_line_hints", {}).get(self.id)
+        return hints or self.reconcile_hints or {}
+
+    def _get_partner_from_reconcile_hints(self):
+        hints = self._get_reconcile_hints()
+        if hints.get("partner_id"):
+            return self.env["res.partner"].browse(hints["partner_id"])
+        if hints.get("partner_bank_id"):
+            bank_account = self.env["res.partner.bank"].browse(hints["partner_bank_id"])
+            return bank_account.partner_id
+        return self.env["res.partner"]
+
     def _retrieve_partner(self):
         self.ensure_one()
 
@@ -17,96 +79,114 @@ class AccountBankStatementLine(models.Model):
         if self.partner_id:
             return self.partner_id
 
+        stage_stat = self.env["account.reconcile.stage.stat"]
+        # Retrieve the partner from the hints given by the importer.
+        with stage_stat._span("retrieve_partner_hints", journal=self.journal_id):
+            partner = self._get_partner_from_reconcile_hints()
+            if partner:
+                return partner
+
         # Retrieve the partner from the bank account.
-        if self.account_number:
-            account_number_nums = sanitize_account_number(self.account_number)
-            if account_number_nums:
-                domain = [("sanitized_acc_number", "ilike", account_number_nums)]
-                for extra_domain in ([("company_id", "=", self.company_id.id)], []):
-                    bank_accounts = self.env["res.partner.bank"].search(
-                        extra_domain + domain
-                    )
-                    if len(bank_accounts.partner_id) == 1:
-                        return bank_accounts.partner_id
+        with stage_stat._span("retrieve_partner_bank_account", journal=self.journal_id):
+            if self.account_number:
+                account_number_nums = sanitize_account_number(self.account_number)
+                if account_number_nums:
+                    domain = [("sanitized_acc_number", "ilike", account_number_nums)]
+                    for extra_domain in ([("company_id", "=", self.company_id.id)], []):
+                        bank_accounts = self.env["res.partner.bank"].search(
+                            extra_domain + domain
+                        )
+                        if len(bank_accounts.partner_id) == 1:
+                            return bank_accounts.partner_id
 
         # Retrieve the partner from the partner name.
-        if self.partner_name:
-            domain = [
-                ("parent_id", "=", False),
-                ("name", "ilike", self.partner_name),
-            ]
-            for extra_domain in ([("company_id", "=", self.company_id.id)], []):
-                partner = self.env["res.partner"].search(extra_domain + domain, limit=1)
-                if partner:
-                    return partner
+        with stage_stat._span("retrieve_partner_name", journal=self.journal_id):
+            if self.partner_name:
+                domain = [
+                    ("parent_id", "=", False),
+                    ("name", "ilike", self.partner_name),
+                ]
+                for extra_domain in ([("company_id", "=", self.company_id.id)], []):
+                    partner = self.env["res.partner"].search(
+                        extra_domain + domain, limit=1
+                    )
+                    if partner:
+                        return partner
 
         # Retrieve the partner from the 'reconcile models'.
-        rec_models = self.env["account.reconcile.model"].search(
-            [
-                ("rule_type", "!=", "writeoff_button"),
-                ("company_id", "=", self.company_id.id),
-            ]
-        )
-        for rec_model in rec_models:
-            partner = rec_model._get_partner_from_mapping(self)
-            if partner and rec_model._is_applicable_for(self, partner):
+        with stage_stat._span("retrieve_partner_mapping", journal=self.journal_id):
+            rec_models = self.env["account.reconcile.model"].search(
+                [
+                    ("rule_type", "!=", "writeoff_button"),
+                    ("company_id", "=", self.company_id.id),
+                ]
+            )
+            partner = rec_models._get_partners_from_mapping(
+                self, check_applicable=True
+            ).get(self.id)
+            if partner:
                 return partner
 
         # Retrieve the partner from statement line text values.
-        st_line_text_values = self._get_st_line_strings_for_matching()
-        unaccent = self.env.registry.unaccent
-        sub_queries = []
-        params = []
-        for text_value in st_line_text_values:
-            if not text_value:
-                continue
-
-            # Find a partner having a name contained inside the statement line values.
-            # Take care a partner could contain some special characters in its name that
-            # needs to be escaped.
-            sub_queries.append(
-                SQL(
-                    rf"""
-                    {unaccent("%s")} ~* ('^' || (
-                        SELECT STRING_AGG(CONCAT('(?=.*\m', chunk[1], '\M)'), '')
-                        FROM regexp_matches({unaccent('partner.name')}, '\w{{3,}}', 'g')
-                        AS chunk
-                    ))
-                    """,
-                    text_value,
+        with stage_stat._span("retrieve_partner_text", journal=self.journal_id):
+            # Both sides are unaccented by the database, so that the statement
+            # texts and the partner names are normalized the same way
+            st_line_text_values = self._get_st_line_strings_for_matching()
+            unaccent = self.env.registry.unaccent
+            sub_queries = []
+            params = []
+            for text_value in st_line_text_values:
+                if not text_value:
+                    continue
+
+                # Find a partner having a name contained inside the statement line
+                # values. Take care a partner could contain some special characters
+                # in its name that needs to be escaped.
+                sub_queries.append(
+                    SQL(
+                        rf"""
+                        {unaccent("%s")} ~* ('^' || (
+                            SELECT STRING_AGG(CONCAT('(?=.*\m', chunk[1], '\M)'), '')
+                            FROM regexp_matches(
+                                {unaccent('partner.name')}, '\w{{3,}}', 'g'
+                            )
+                            AS chunk
+                        ))
+                        """,
+                        text_value,
+                    )
                 )
-            )
-            params.append(text_value)
-
-        if sub_queries:
-            self.env["res.partner"].flush_model(["company_id", "name"])
-            self.env["account.move.line"].flush_model(["partner_id", "company_id"])
-            query = SQL("""
-                SELECT aml.partner_id
-                FROM account_move_line aml
-                JOIN res_partner partner ON
-                    aml.partner_id = partner.id
-                    AND partner.name IS NOT NULL
-                    AND partner.active
-                    AND ((
-            """)
-            query_parts = SQL(") OR (").join(sub_queries)
-            final_query = SQL(
-                """
-                %s
+                params.append(text_value)
+
+            if sub_queries:
+                self.env["res.partner"].flush_model(["company_id", "name"])
+                self.env["account.move.line"].flush_model(["partner_id", "company_id"])
+                query = SQL("""
+                    SELECT aml.partner_id
+                    FROM account_move_line aml
+                    JOIN res_partner partner ON
+                        aml.partner_id = partner.id
+                        AND partner.name IS NOT NULL
+                        AND partner.active
+                        AND ((
+                """)
+                query_parts = SQL(") OR (").join(sub_queries)
+                final_query = SQL(
+                    """
                     %s
-                ))
-                WHERE aml.company_id = %s
-                LIMIT 1
-            """,
-                query,
-                query_parts,
-                self.company_id.id,
-            )
-            self._cr.execute(final_query)
-            row = self._cr.fetchone()
-            if row:
-                return self.env["res.partner"].browse(row[0])
+                        %s
+                    ))
+                    WHERE aml.company_id = %s
+                    LIMIT 1
+                """,
+                    query,
+                    query_parts,
+                    self.company_id.id,
+                )
+                self._cr.execute(final_query)
+                row = self._cr.fetchone()
+                if row:
+                    return self.env["res.partner"].browse(row[0])
 
         return self.env["res.partner"]
 
@@ -123,7 +203,7 @@ class AccountBankStatementLine(models.Model):
             if self.payment_ref:
                 st_line_text_values.append(self.payment_ref)
         if not allowed_fields or "narration" in allowed_fields:
-            value = html2plaintext(self.narration or "")
+            value = html_to_plaintext(self.narration)
             if value:
                 st_line_text_values.append(value)
         if not allowed_fields or "ref" in allowed_fields:
@@ -0,0 +1,20 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import models
+from odoo.tools.sql import create_index
+
+
+class AccountMoveLine(models.Model):
+    _inherit = "account.move.line"
+
+    def init(self):
+        super().init()
+        # Lookup of the candidates by amount, for the statement lines without
+        # partner (see _get_invoice_matching_amls_candidates)
+        for fname in ("amount_residual", "amount_residual_currency"):
+            create_index(
+                self._cr,
+                f"account_move_line_currency_id_{fname}_index",
+                self._table,
+                ["currency_id", fname],
+            )
@@ -1,10 +1,22 @@
-import re
+import time
 from collections import defaultdict
 
 from dateutil.relativedelta import relativedelta
 
 from odoo import Command, api, fields, models, tools
 
+from ..tools import (
+    compile_matching_regex,
+    html_to_plaintext,
+    normalize_matching_text,
+    tokenize_matching_text,
+)
+
+# Minimal size of the statement line tokens compared to the references, and
+# maximal number of candidates, of the fuzzy reference matching
+FUZZY_REFERENCE_MIN_SIZE = 6
+FUZZY_REFERENCE_LIMIT = 10
+
 
 class AccountReconcileModel(models.Model):
     _inherit = "account.reconcile.model"
@@ -15,6 +27,73 @@ class AccountReconcileModel(models.Model):
         "one possible counterpart is found.",
     )
 
+    match_fuzzy_reference = fields.Boolean(
+        string="Fuzzy reference matching",
+        help="If no counterpart is found with the exact references, suggest the "
+        "journal items whose entry number or reference is similar to the texts "
+        "of the statement line. Requires the pg_trgm PostgreSQL extension.",
+    )
+    fuzzy_reference_threshold = fields.Float(
+        string="Similarity threshold",
+        default=0.5,
+        help="Minimal trigram similarity, between 0 and 1, between a reference "
+        "found in the statement line and the entry number or reference.",
+    )
+    adaptive_order = fields.Boolean(
+        string="Interchangeable order",
+        help="Consecutive models having this box checked can be applied in any "
+        "order. They are then tried from the one with the lowest observed cost "
+        "per match to the highest, on each journal.",
+    )
+
+    _sql_constraints = [
+        (
+            "fuzzy_reference_threshold_range",
+            "CHECK(fuzzy_reference_threshold >= 0 AND fuzzy_reference_threshold <= 1)",
+            "The similarity threshold must be between 0 and 1.",
+        ),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    @tools.ormcache("company_id", "journal_id", "auto_only")
+    def _get_reconcile_model_ids(self, company_id, journal_id, auto_only=False):
+        """Return the ids of the models that can be applied automatically on the
+        statement lines of a journal. The result is cached until a model is
+        created, modified or deleted. As it is shared by all the users, it does
+        not depend on the context nor on the access rights: only the active
+        models are returned, whoever calls it.
+        :param company_id: The company of the journal.
+        :param journal_id: The journal of the statement lines.
+        :param auto_only: Only return the models that reconcile automatically.
+        :return: A tuple of account.reconcile.model ids.
+        """
+        domain = [
+            ("rule_type", "in", ["invoice_matching", "writeoff_suggestion"]),
+            ("company_id", "=", company_id),
+            "|",
+            ("match_journal_ids", "=", False),
+            ("match_journal_ids", "in", journal_id),
+        ]
+        if auto_only:
+            domain.append(("auto_reconcile", "=", True))
+        return tuple(self.sudo().with_context(active_test=True).search(domain).ids)
+
     @api.onchange("rule_type")
     def _onchange_rule_type(self):
         if self.rule_type != "invoice_matching":
@@ -205,40 +284,154 @@ class AccountReconcileModel(models.Model):
         available_models = self.filtered(
             lambda m: m.rule_type != "writeoff_button"
         ).sorted()
+        stage_stat = self.env["account.reconcile.stage.stat"]
+        journal = st_line.journal_id
+        if any(available_models.mapped("adaptive_order")):
+            available_models = available_models._sort_by_observed_cost(journal)
 
         for rec_model in available_models:
-            if not rec_model._is_applicable_for(st_line, partner):
-                continue
+            start = time.perf_counter()
+            res = rec_model._apply_rule(st_line, partner)
+            if rec_model.adaptive_order and st_line.id:
+                stage_stat._record_stage(
+                    "apply_rule",
+                    journal.id,
+                    rec_model.id,
+                    time.perf_counter() - start,
+                    hit=bool(res),
+                )
+            if res:
+                return res
+        return {}
 
-            if rec_model.rule_type == "invoice_matching":
-                rules_map = rec_model._get_invoice_matching_rules_map()
-                for rule_index in sorted(rules_map.keys()):
-                    for rule_method in rules_map[rule_index]:
+    def _sort_by_observed_cost(self, journal):
+        """Sort each run of consecutive interchangeable models by expected cost
+        per match on the journal, keeping the other models in place.
+        """
+        costs = self.env["account.reconcile.stage.stat"]._get_model_costs(journal)
+
+        def expected_cost(rec_model):
+            calls, hits, duration = costs.get(rec_model.id, (0, 0, 0.0))
+            if not calls:
+                # Try the models without statistics first, to collect them
+                return 0.0
+            # The hit rate is smoothed so that a model without hits so far is
+            # not discarded forever
+            return (duration / calls) / ((hits + 1) / (calls + 1))
+
+        model_ids = []
+        block = []
+        for rec_model in self:
+            if rec_model.adaptive_order:
+                block.append(rec_model)
+                continue
+            model_ids += [m.id for m in sorted(block, key=expected_cost)]
+            block = []
+            model_ids.append(rec_model.id)
+        model_ids += [m.id for m in sorted(block, key=expected_cost)]
+        return self.browse(model_ids)
+
+    def _apply_rule(self, st_line, partner):
+        """Apply this reconciliation model on the statement line.
+        :param st_line: The statement line to match.
+        :param partner: The partner to consider.
+        :return: The result of the model, as described in _apply_rules, or an
+            empty dict if the model found nothing.
+        """
+        self.ensure_one()
+        stage_stat = self.env["account.reconcile.stage.stat"]
+        trace = self.env["account.reconcile.trace"]
+        journal = st_line.journal_id
+        start = time.perf_counter()
+
+        with stage_stat._span("is_applicable", journal=journal, model=self):
+            is_applicable = self._is_applicable_for(st_line, partner)
+        if not is_applicable:
+            trace._record_trace(
+                st_line,
+                self,
+                "is_applicable",
+                self.env["account.move.line"],
+                "not_applicable",
+                time.perf_counter() - start,
+            )
+            return {}
+
+        if self.rule_type == "invoice_matching":
+            rules_map = self._get_invoice_matching_rules_map()
+            for rule_index in sorted(rules_map.keys()):
+                for rule_method in rules_map[rule_index]:
+                    with stage_stat._span(
+                        rule_method.__name__, journal=journal, model=self
+                    ):
                         candidate_vals = rule_method(st_line, partner)
-                        if not candidate_vals:
-                            continue
-
-                        if candidate_vals.get("amls"):
-                            res = rec_model._get_invoice_matching_amls_result(
+                    if not candidate_vals:
+                        continue
+
+                    if candidate_vals.get("amls"):
+                        with stage_stat._span(
+                            "invoice_matching_amls_result",
+                            journal=journal,
+                            model=self,
+                        ):
+                            match_type, res = self._get_invoice_matching_amls_match(
                                 st_line, partner, candidate_vals
                             )
-                            if res:
-                                return {
-                                    **res,
-                                    "model": rec_model,
-                                }
+                        if not res:
+                            status = "rejected"
+                        elif res.get("status") == "write_off":
+                            status = "write_off"
                         else:
+                            status = match_type
+                        trace._record_trace(
+                            st_line,
+                            self,
+                            rule_method.__name__,
+                            candidate_vals["amls"],
+                            status,
+                            time.perf_counter() - start,
+                        )
+                        if res:
                             return {
-                                **candidate_vals,
-                                "model": rec_model,
+                                **res,
+                                "model": self,
                             }
-
-            elif rec_model.rule_type == "writeoff_suggestion":
-                return {
-                    "model": rec_model,
-                    "status": "write_off",
-                    "auto_reconcile": rec_model.auto_reconcile,
-                }
+                    else:
+                        trace._record_trace(
+                            st_line,
+                            self,
+                            rule_method.__name__,
+                            self.env["account.move.line"],
+                            "perfect",
+                            time.perf_counter() - start,
+                        )
+                        return {
+                            **candidate_vals,
+                            "model": self,
+                        }
+
+        elif self.rule_type == "writeoff_suggestion":
+            trace._record_trace(
+                st_line,
+                self,
+                self.rule_type,
+                self.env["account.move.line"],
+                "write_off",
+                time.perf_counter() - start,
+            )
+            return {
+                "model": self,
+                "status": "write_off",
+                "auto_reconcile": self.auto_reconcile,
+            }
+        trace._record_trace(
+            st_line,
+            self,
+            self.rule_type,
+            self.env["account.move.line"],
+            "no_match",
+            time.perf_counter() - start,
+        )
         return {}
 
     def _is_applicable_for(self, st_line, partner):
@@ -286,13 +479,13 @@ class AccountReconcileModel(models.Model):
             return False
 
         # Filter on label, note and transaction_type
-        for record, rule_field, record_field in [
-            (st_line, "label", "payment_ref"),
-            (st_line.move_id, "note", "narration"),
-            (st_line, "transaction_type", "transaction_type"),
+        for rule_field, record_term in [
+            ("label", st_line.matching_payment_ref),
+            ("note", st_line.matching_narration),
+            ("transaction_type", st_line.matching_transaction_type),
         ]:
-            rule_term = (self["match_" + rule_field + "_param"] or "").lower()
-            record_term = (record[record_field] or "").lower()
+            rule_term = normalize_matching_text(self["match_" + rule_field + "_param"])
+            record_term = record_term or ""
 
             # This defines non-match conditions
             if (
@@ -306,7 +499,7 @@ class AccountReconcileModel(models.Model):
                 )
                 or (
                     self["match_" + rule_field] == "match_regex"
-                    and not re.match(rule_term, record_term)
+                    and not compile_matching_regex(rule_term).match(record_term)
                 )
             ):
                 return False
@@ -364,33 +557,20 @@ class AccountReconcileModel(models.Model):
                     The second element is a list of tokens you may match exactly.
         """
         st_line_text_values = self._get_st_line_text_values_for_matching(st_line)
-        significant_token_size = 4
         numerical_tokens = []
         exact_tokens = []
         text_tokens = []
         for text_value in st_line_text_values:
-            tokens = [
-                "".join(x for x in token if re.match(r"[0-9a-zA-Z\s]", x))
-                for token in (text_value or "").split()
-            ]
-
-            # Numerical tokens
-            for token in tokens:
-                # The token is too short to be significant.
-                if len(token) < significant_token_size:
-                    continue
-
-                text_tokens.append(token)
-                formatted_token = "".join(x for x in token if x.isdecimal())
-
-                # The token is too short after formatting to be significant.
-                if len(formatted_token) < significant_token_size:
-                    continue
-
-                numerical_tokens.append(formatted_token)
+            (
+                value_numerical_tokens,
+                value_text_tokens,
+                single_token,
+            ) = tokenize_matching_text(text_value or "")
+            numerical_tokens += value_numerical_tokens
+            text_tokens += value_text_tokens
 
             # Exact tokens.
-            if len(tokens) == 1:
+            if single_token:
                 exact_tokens.append(text_value)
         return numerical_tokens, exact_tokens, text_tokens
 
@@ -539,6 +719,9 @@ class AccountReconcileModel(models.Model):
             else:
                 aml_amount_field = "amount_residual_currency"
 
+            # The range on the raw amount lets the lookup use the amount
+            # indexes, the rounding then discards the amounts near its bounds
+            amount = -st_line.amount_residual
             order_by = get_order_by_clause(alias="account_move_line")
             self._cr.execute(
                 f"""
@@ -547,14 +730,17 @@ class AccountReconcileModel(models.Model):
                     WHERE
                         {where_clause}
                         AND account_move_line.currency_id = %s
+                        AND account_move_line.{aml_amount_field} BETWEEN %s AND %s
                         AND ROUND(account_move_line.{aml_amount_field}, %s) = ROUND(%s, %s)
                     ORDER BY {order_by}
                 """,  # noqa: E501
                 where_params
                 + [
                     st_line_currency.id,
+                    amount - st_line_currency.rounding,
+                    amount + st_line_currency.rounding,
                     st_line_currency.decimal_places,
-                    -st_line.amount_residual,
+                    amount,
                     st_line_currency.decimal_places,
                 ],
             )
@@ -584,9 +770,113 @@ class AccountReconcileModel(models.Model):
               candidates journal items found.
         """
         rules_map = defaultdict(list)
+        rules_map[5].append(self._get_invoice_matching_hint_candidates)
         rules_map[10].append(self._get_invoice_matching_amls_candidates)
+        rules_map[20].append(self._get_invoice_matching_fuzzy_candidates)
         return rules_map
 
+    def _get_invoice_matching_fuzzy_candidates(self, st_line, partner):
+        """Returns the candidates whose entry number or reference is similar to
+        a reference found in the texts of the statement line, the most similar
+        first. Only the tokens long enough and not purely numerical are compared,
+        as a whole, to the entry number and reference: a year or a common word
+        would otherwise match most of them.
+        :param st_line: A statement line.
+        :param partner: The partner associated to the statement line.
+        """
+        if not self.match_fuzzy_reference or not self.env.registry.has_trigram:
+            return
+        _numerical_tokens, exact_tokens, text_tokens = (
+            self._get_invoice_matching_st_line_tokens(st_line)
+        )
+        tokens = list(
+            {
+                token
+                for token in exact_tokens + text_tokens
+                if len(token) >= FUZZY_REFERENCE_MIN_SIZE and not token.isdigit()
+            }
+        )
+        if not tokens:
+            return
+
+        self.env["account.move"].flush_model(["name", "ref"])
+        self.env["account.move.line"].flush_model()
+        aml_domain = self._get_invoice_matching_amls_domain(st_line, partner)
+        query = self.env["account.move.line"]._where_calc(aml_domain)
+        # The setting is unknown until pg_trgm is loaded in the connection
+        self._cr.execute(
+            "SELECT current_setting('pg_trgm.similarity_threshold', true), "
+            "set_config('pg_trgm.similarity_threshold', %s, true)",
+            [str(self.fuzzy_reference_threshold)],
+        )
+        previous_threshold = self._cr.fetchone()[0]
+        direction = "DESC" if self.matching_order == "new_first" else "ASC"
+        from_string, from_params = query.from_clause
+        where_string, where_params = query.where_clause
+        # The similar moves are searched first, one token at a time, so that
+        # the trigram indexes of account_move.name and account_move.ref can be
+        # used, before joining the open journal items
+        self._cr.execute(
+            f"""
+                WITH fuzzy_move AS (
+                    SELECT fuzzy.id, MAX(fuzzy.score) AS score
+                    FROM UNNEST(%s::text[]) AS token
+                    CROSS JOIN LATERAL (
+                        SELECT move.id, SIMILARITY(move.name, token) AS score
+                        FROM account_move move
+                        WHERE move.name %% token
+                        UNION ALL
+                        SELECT move.id, SIMILARITY(move.ref, token) AS score
+                        FROM account_move move
+                        WHERE move.ref %% token
+                    ) AS fuzzy
+                    GROUP BY fuzzy.id
+                )
+                SELECT account_move_line.id
+                FROM {from_string}
+                JOIN fuzzy_move ON fuzzy_move.id = account_move_line.move_id
+                WHERE {where_string}
+                ORDER BY
+                    fuzzy_move.score DESC,
+                    account_move_line.date_maturity {direction},
+                    account_move_line.id {direction}
+                LIMIT %s
+            """,
+            [tokens, *from_params, *where_params, FUZZY_REFERENCE_LIMIT],
+        )
+        candidate_ids = [row[0] for row in self._cr.fetchall()]
+        if previous_threshold is not None:
+            self._cr.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                [previous_threshold],
+            )
+        if candidate_ids and (not self.unique_matching or len(candidate_ids) == 1):
+            return {
+                "allow_auto_reconcile": False,
+                "amls": self.env["account.move.line"].browse(candidate_ids),
+            }
+
+    def _get_invoice_matching_hint_candidates(self, st_line, partner):
+        """Returns the candidates of the invoice reference given as hint by the
+        importer of the statement line, if any.
+        :param st_line: A statement line.
+        :param partner: The partner associated to the statement line.
+        """
+        reference = st_line._get_reconcile_hints().get("invoice_reference")
+        if not reference:
+            return
+        aml_domain = self._get_invoice_matching_amls_domain(st_line, partner) + [
+            "|",
+            ("move_id.name", "=", reference),
+            ("move_id.payment_reference", "=", reference),
+        ]
+        amls = self.env["account.move.line"].search(aml_domain)
+        if amls and (not self.unique_matching or len(amls.move_id) == 1):
+            return {
+                "allow_auto_reconcile": True,
+                "amls": amls,
+            }
+
     def _get_partner_from_mapping(self, st_line):
         """Find partner with mapping defined on model.
         For invoice matching rules, matches the statement line against each
@@ -600,30 +890,71 @@ class AccountReconcileModel(models.Model):
             not applicable.
         """
         self.ensure_one()
+        return self._get_partners_from_mapping(st_line).get(
+            st_line.id, self.env["res.partner"]
+        )
 
-        if self.rule_type not in ("invoice_matching", "writeoff_suggestion"):
-            return self.env["res.partner"]
-
-        for partner_mapping in self.partner_mapping_line_ids:
-            match_payment_ref = (
-                re.match(partner_mapping.payment_ref_regex, st_line.payment_ref)
-                if partner_mapping.payment_ref_regex
-                else True
-            )
-            match_narration = (
-                re.match(
-                    partner_mapping.narration_regex,
-                    tools.html2plaintext(st_line.narration or "").rstrip(),
-                )
-                if partner_mapping.narration_regex
-                else True
+    def _get_partners_from_mapping(self, st_lines, check_applicable=False):
+        """Find the partners of several statement lines with the mappings of
+        several models, in a single pass.
+        :param st_lines: The statement lines that need a partner to be found.
+        :param check_applicable: Only keep the partner found by a model if the
+            model is applicable for the statement line and this partner. As in
+            _get_partner_from_mapping, only the first matching mapping of each
+            model is considered.
+        :return: A dict mapping the statement line ids to the partner of the first
+            matching mapping, the models being considered in the order of self.
+        """
+        mappings = [
+            (
+                rec_model,
+                partner_mapping.partner_id,
+                partner_mapping.payment_ref_regex
+                and compile_matching_regex(partner_mapping.payment_ref_regex),
+                partner_mapping.narration_regex
+                and compile_matching_regex(partner_mapping.narration_regex),
             )
-
-            if match_payment_ref and match_narration:
-                return partner_mapping.partner_id
-        return self.env["res.partner"]
-
-    def _get_invoice_matching_amls_result(self, st_line, partner, candidate_vals):  # noqa: C901
+            for rec_model in self
+            if rec_model.rule_type in ("invoice_matching", "writeoff_suggestion")
+            for partner_mapping in rec_model.partner_mapping_line_ids
+        ]
+        partners = {}
+        if not mappings:
+            return partners
+        for st_line in st_lines:
+            payment_ref = st_line.payment_ref or ""
+            narration = None
+            rejected_model = None
+            for rec_model, partner, payment_ref_regex, narration_regex in mappings:
+                if rec_model == rejected_model:
+                    continue
+                if payment_ref_regex and not payment_ref_regex.match(payment_ref):
+                    continue
+                if narration_regex:
+                    if narration is None:
+                        narration = html_to_plaintext(st_line.narration).rstrip()
+                    if not narration_regex.match(narration):
+                        continue
+                if check_applicable and not rec_model._is_applicable_for(
+                    st_line, partner
+                ):
+                    rejected_model = rec_model
+                    continue
+                partners[st_line.id] = partner
+                break
+        return partners
+
+    def _get_invoice_matching_amls_result(self, st_line, partner, candidate_vals):
+        return self._get_invoice_matching_amls_match(
+            st_line, partner, candidate_vals
+        )[1]
+
+    def _get_invoice_matching_amls_match(self, st_line, partner, candidate_vals):  # noqa: C901
+        """Evaluate the candidates found for the statement line.
+        :return: A tuple (match type, result) where the match type is 'perfect'
+            when the candidates exactly pay the statement line and 'partial'
+            otherwise. The result is the one of _get_invoice_matching_amls_result.
+        """
         def _create_result_dict(amls_values_list, status):
             if "rejected" in status:
                 return
@@ -735,18 +1066,23 @@ class AccountReconcileModel(models.Model):
 
         # Try to match the amls having the same currency as the statement line.
         if not kepts_amls_values_list:
-            _match_type, kepts_amls_values_list = match_batch_amls(amls_values_list)
+            match_type, kepts_amls_values_list = match_batch_amls(amls_values_list)
 
         # Try to match the whole candidates.
         if not kepts_amls_values_list:
+            match_type = "partial"
             kepts_amls_values_list = amls_values_list
 
         # Try to match the amls having the same currency as the statement line.
         if kepts_amls_values_list:
-            status = self._check_rule_propositions(st_line, kepts_amls_values_list)
+            with self.env["account.reconcile.stage.stat"]._span(
+                "check_rule_propositions", journal=st_line.journal_id, model=self
+            ):
+                status = self._check_rule_propositions(st_line, kepts_amls_values_list)
             result = _create_result_dict(kepts_amls_values_list, status)
             if result:
-                return result
+                return match_type, result
+        return match_type, None
 
     def _check_rule_propositions(self, st_line, amls_values_list):
         """Check restrictions that can't be handled for each move.line separately.
@@ -0,0 +1,253 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+from odoo import api, fields, models
+from odoo.tools import SQL, str2bool
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+class AccountReconcileStageStat(models.Model):
+    """Time spent in each stage of the matching of the statement lines.
+
+    The statistics of all the stages are collected when enabled, with the
+    ``account_reconcile_model_oca.stage_stats`` system parameter or the
+    ``reconcile_stage_stats`` context key. Those of the apply_rule stage are
+    always collected for the interchangeable reconcile models, which are
+    ordered with them.
+
+    They are accumulated in memory during the transaction and inserted once,
+    before its commit, as new rows: concurrent transactions never update the
+    same rows. The rows of a same stage are summed up by the autovacuum.
+    """
+
+    _name = "account.reconcile.stage.stat"
+    _description = "Reconcile Matching Stage Statistics"
+    _order = "duration desc"
+
+    journal_id = fields.Many2one(
+        "account.journal", readonly=True, index=True, ondelete="cascade"
+    )
+    model_id = fields.Many2one(
+        "account.reconcile.model", readonly=True, index=True, ondelete="cascade"
+    )
+    stage = fields.Char(required=True, readonly=True)
+    calls = fields.Integer(readonly=True)
+    hits = fields.Integer(
+        readonly=True, help="Calls that found a match, for the apply_rule stage."
+    )
+    duration = fields.Float(
+        readonly=True, digits=(16, 6), help="Total duration, in seconds."
+    )
+    average_duration = fields.Float(
+        compute="_compute_average_duration",
+        digits=(16, 6),
+        help="Average duration of a call, in seconds.",
+    )
+
+    def init(self):
+        create_index(
+            self._cr,
+            "account_reconcile_stage_stat_journal_id_stage_index",
+            self._table,
+            ["journal_id", "stage"],
+        )
+
+    @api.depends("calls", "duration")
+    def _compute_average_duration(self):
+        for record in self:
+            record.average_duration = (
+                record.duration / record.calls if record.calls else 0.0
+            )
+
+    @api.model
+    def _is_stage_stats_enabled(self):
+        if "reconcile_stage_stats" in self.env.context:
+            return self.env.context["reconcile_stage_stats"]
+        return str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_reconcile_model_oca.stage_stats", "False")
+        )
+
+    @api.model
+    def _span(self, stage, journal=None, model=None):
+        """Return a context manager measuring the time spent in ``stage``.
+
+        :param stage: Name of the measured stage.
+        :param journal: The account.journal of the statement line, if any.
+        :param model: The account.reconcile.model applied, if any.
+        """
+        if not self._is_stage_stats_enabled():
+            return nullcontext()
+        return self._record_span(
+            stage, journal.id if journal else False, model.id if model else False
+        )
+
+    @contextmanager
+    def _record_span(self, stage, journal_id, model_id):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record_stage(
+                stage, journal_id, model_id, time.perf_counter() - start
+            )
+
+    @api.model
+    def _record_stage(self, stage, journal_id, model_id, duration, hit=False):
+        stat = self._get_pending_stage_stats()[(journal_id, model_id, stage)]
+        stat[0] += 1
+        stat[1] += duration
+        stat[2] += hit
+
+    def _get_pending_stage_stats(self):
+        precommit = self.env.cr.precommit
+        if "account_reconcile_stage_stats" not in precommit.data:
+            precommit.data["account_reconcile_stage_stats"] = defaultdict(
+                lambda: [0, 0.0, 0]
+            )
+            precommit.add(self._flush_stage_stats)
+        return precommit.data["account_reconcile_stage_stats"]
+
+    def _flush_stage_stats(self):
+        stats = self.env.cr.precommit.data.pop("account_reconcile_stage_stats", {})
+        # Records deleted in the transaction can't be referenced anymore
+        journal_ids = set(
+            self.env["account.journal"]
+            .browse({journal_id for journal_id, _model_id, _stage in stats})
+            .exists()
+            .ids
+        )
+        model_ids = set(
+            self.env["account.reconcile.model"]
+            .browse({model_id for _journal_id, model_id, _stage in stats})
+            .exists()
+            .ids
+        )
+        values = []
+        for (journal_id, model_id, stage), (calls, duration, hits) in stats.items():
+            _logger.info(
+                "Reconcile stage stats: journal_id=%s model_id=%s stage=%s "
+                "calls=%s hits=%s duration=%.6f",
+                journal_id,
+                model_id,
+                stage,
+                calls,
+                hits,
+                duration,
+            )
+            if (journal_id and journal_id not in journal_ids) or (
+                model_id and model_id not in model_ids
+            ):
+                continue
+            values.append(
+                SQL(
+                    "(%s, %s, %s, %s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC', "
+                    "NOW() AT TIME ZONE 'UTC')",
+                    journal_id or None,
+                    model_id or None,
+                    stage,
+                    calls,
+                    hits,
+                    duration,
+                    self.env.uid,
+                    self.env.uid,
+                )
+            )
+        if not values:
+            return
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO account_reconcile_stage_stat (
+                    journal_id, model_id, stage, calls, hits, duration,
+                    create_uid, write_uid, create_date, write_date
+                )
+                VALUES %s
+                """,
+                SQL(", ").join(values),
+            )
+        )
+        self.invalidate_model()
+        self.env.cr.cache.pop("account_reconcile_model_costs", None)
+
+    @api.model
+    def _get_model_costs(self, journal):
+        """Return the observed cost of the reconcile models on ``journal``.
+
+        The statistics are read once per transaction.
+
+        :return: A dict mapping reconcile model ids to a tuple (calls, hits,
+            duration) of the apply_rule stage.
+        """
+        costs = self.env.cr.cache.setdefault("account_reconcile_model_costs", {})
+        if journal.id not in costs:
+            self.env.cr.execute(
+                SQL(
+                    """
+                    SELECT model_id, SUM(calls), SUM(COALESCE(hits, 0)), SUM(duration)
+                    FROM account_reconcile_stage_stat
+                    WHERE journal_id = %s
+                        AND stage = 'apply_rule'
+                        AND model_id IS NOT NULL
+                    GROUP BY model_id
+                    """,
+                    journal.id,
+                )
+            )
+            costs[journal.id] = {
+                model_id: (calls, hits, duration)
+                for model_id, calls, hits, duration in self.env.cr.fetchall()
+            }
+        return costs[journal.id]
+
+    @api.autovacuum
+    def _gc_stage_stats(self):
+        """Sum up the rows of each stage into a single one.
+
+        The rows inserted by the transactions running meanwhile are not
+        visible to the deletion, they are summed up by the next run.
+        """
+        self.env.cr.execute(
+            SQL(
+                """
+                WITH deleted AS (
+                    DELETE FROM account_reconcile_stage_stat
+                    WHERE (COALESCE(journal_id, 0), COALESCE(model_id, 0), stage) IN (
+                        SELECT COALESCE(journal_id, 0), COALESCE(model_id, 0), stage
+                        FROM account_reconcile_stage_stat
+                        GROUP BY 1, 2, 3
+                        HAVING COUNT(*) > 1
+                    )
+                    RETURNING *
+                )
+                INSERT INTO account_reconcile_stage_stat (
+                    journal_id, model_id, stage, calls, hits, duration,
+                    create_uid, write_uid, create_date, write_date
+                )
+                SELECT
+                    journal_id, model_id, stage, SUM(calls),
+                    SUM(COALESCE(hits, 0)), SUM(duration), %s, %s,
+                    MIN(create_date), MAX(write_date)
+                FROM deleted
+                GROUP BY journal_id, model_id, stage
+                """,
+                self.env.uid,
+                self.env.uid,
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def action_open_stage_stats(self, domain=None):
+        action = self.env["ir.actions.act_window"]._for_xml_id(
+            "account_reconcile_model_oca.account_reconcile_stage_stat_action"
+        )
+        action["domain"] = domain or []
+        return action
@@ -0,0 +1,142 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import json
+
+from odoo import api, fields, models
+from odoo.tools import SQL, str2bool
+
+
+class AccountReconcileTrace(models.Model):
+    """Decisions taken by the reconcile models on the statement lines.
+
+    The traces are only recorded when enabled, with the
+    ``account_reconcile_model_oca.trace`` system parameter or the
+    ``reconcile_trace`` context key. Every evaluation of a model is traced,
+    including the ones finding nothing, so that a replay with other settings
+    can show the statement lines they would newly match. The traces are never
+    modified: they are inserted in batch before the commit of the transaction.
+    """
+
+    _name = "account.reconcile.trace"
+    _description = "Reconcile Matching Trace"
+    _order = "date desc, id desc"
+    _log_access = False
+
+    date = fields.Datetime(readonly=True, index=True)
+    statement_line_id = fields.Many2one(
+        "account.bank.statement.line", readonly=True, index=True, ondelete="cascade"
+    )
+    journal_id = fields.Many2one("account.journal", readonly=True, ondelete="cascade")
+    model_id = fields.Many2one(
+        "account.reconcile.model", readonly=True, index=True, ondelete="cascade"
+    )
+    rule = fields.Char(readonly=True)
+    candidate_ids = fields.Json(readonly=True)
+    candidate_count = fields.Integer(readonly=True)
+    status = fields.Selection(
+        [
+            ("perfect", "Perfect Match"),
+            ("partial", "Partial Match"),
+            ("write_off", "Write-off"),
+            ("rejected", "Rejected"),
+            ("no_match", "No Match"),
+            ("not_applicable", "Not Applicable"),
+        ],
+        readonly=True,
+    )
+    duration = fields.Float(
+        readonly=True, digits=(16, 6), help="Time spent by the model, in seconds."
+    )
+
+    @api.model
+    def _is_trace_enabled(self):
+        if "reconcile_trace" in self.env.context:
+            return self.env.context["reconcile_trace"]
+        return str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_reconcile_model_oca.trace", "False")
+        )
+
+    @api.model
+    def _record_trace(self, st_line, model, rule, candidates, status, duration):
+        """Keep the decision of ``model`` on ``st_line``, to be written before
+        the commit of the transaction.
+
+        :param rule: Name of the rule that found the candidates.
+        :param candidates: The account.move.line candidates found by the rule.
+        :param status: The match status, see the status field.
+        :param duration: Time spent by the model on the statement line.
+        """
+        # New records (from the widget onchanges) have no id to refer to
+        if not st_line.id or not self._is_trace_enabled():
+            return
+        precommit = self.env.cr.precommit
+        if "account_reconcile_traces" not in precommit.data:
+            precommit.data["account_reconcile_traces"] = []
+            precommit.add(self._flush_traces)
+        precommit.data["account_reconcile_traces"].append(
+            (
+                st_line.id,
+                st_line.journal_id.id,
+                model.id,
+                rule,
+                candidates.ids,
+                status,
+                duration,
+            )
+        )
+
+    def _flush_traces(self):
+        traces = self.env.cr.precommit.data.pop("account_reconcile_traces", [])
+        # Records deleted in the transaction can't be referenced anymore
+        st_line_ids = set(
+            self.env["account.bank.statement.line"]
+            .browse({trace[0] for trace in traces})
+            .exists()
+            .ids
+        )
+        model_ids = set(
+            self.env["account.reconcile.model"]
+            .browse({trace[2] for trace in traces})
+            .exists()
+            .ids
+        )
+        values = [
+            SQL(
+                "(NOW() AT TIME ZONE 'UTC', %s, %s, %s, %s, %s::jsonb, %s, %s, %s)",
+                st_line_id,
+                journal_id,
+                model_id,
+                rule,
+                json.dumps(candidate_ids),
+                len(candidate_ids),
+                status,
+                duration,
+            )
+            for (
+                st_line_id,
+                journal_id,
+                model_id,
+                rule,
+                candidate_ids,
+                status,
+                duration,
+            ) in traces
+            if st_line_id in st_line_ids and model_id in model_ids
+        ]
+        if not values:
+            return
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO account_reconcile_trace (
+                    date, statement_line_id, journal_id, model_id, rule,
+                    candidate_ids, candidate_count, status, duration
+                )
+                VALUES %s
+                """,
+                SQL(", ").join(values),
+            )
+        )
+        self.invalidate_model()
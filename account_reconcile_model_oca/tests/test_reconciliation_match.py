@@ -332,6 +332,149 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
             },
         )
 
+    def test_matching_stage_stats(self):
+        stage_stat = self.env["account.reconcile.stage.stat"]
+        rule = self.rule_1.with_context(reconcile_stage_stats=True)
+        rule._apply_rules(self.bank_line_1, self.bank_line_1._retrieve_partner())
+        rule._apply_rules(self.bank_line_1, self.bank_line_1._retrieve_partner())
+        stage_stat._flush_stage_stats()
+        stats = stage_stat.search([("model_id", "=", self.rule_1.id)])
+        self.assertIn("is_applicable", stats.mapped("stage"))
+        self.assertIn("_get_invoice_matching_amls_candidates", stats.mapped("stage"))
+        self.assertEqual(
+            stats.filtered(lambda stat: stat.stage == "is_applicable").calls, 2
+        )
+        self.assertEqual(stats.journal_id, self.bank_line_1.journal_id)
+
+    def test_stage_stats_append_only(self):
+        stage_stat = self.env["account.reconcile.stage.stat"]
+        for duration in (1.0, 2.0):
+            stage_stat._record_stage(
+                "apply_rule", self.bank_journal.id, self.rule_1.id, duration, hit=True
+            )
+            stage_stat._flush_stage_stats()
+        domain = [("model_id", "=", self.rule_1.id), ("stage", "=", "apply_rule")]
+        self.assertEqual(len(stage_stat.search(domain)), 2)
+        self.env.cr.cache.pop("account_reconcile_model_costs", None)
+        self.assertEqual(
+            stage_stat._get_model_costs(self.bank_journal)[self.rule_1.id],
+            (2, 2, 3.0),
+        )
+        stage_stat._gc_stage_stats()
+        stats = stage_stat.search(domain)
+        self.assertEqual(len(stats), 1)
+        self.assertEqual((stats.calls, stats.hits, stats.duration), (2, 2, 3.0))
+
+    def test_matching_trace_replay(self):
+        trace = self.env["account.reconcile.trace"]
+        rule = self.rule_1.with_context(reconcile_trace=True)
+        rule._apply_rules(self.bank_line_1, self.bank_line_1._retrieve_partner())
+        trace._flush_traces()
+        traces = trace.search([("statement_line_id", "=", self.bank_line_1.id)])
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces.model_id, self.rule_1)
+        self.assertEqual(traces.candidate_ids, self.invoice_line_1.ids)
+        self.assertIn(traces.status, ("perfect", "partial"))
+        replay = (
+            self.env["account.reconcile.trace.replay"]
+            .with_context(active_ids=traces.ids)
+            .create({})
+        )
+        self.assertEqual(replay.model_id, self.rule_1)
+        replay.matching_order = "new_first"
+        replay.action_replay()
+        self.assertEqual(replay.state, "done")
+        self.assertEqual(replay.line_count, 1)
+        self.assertEqual(replay.traced_hit_rate, 1.0)
+        self.assertEqual(replay.replay_hit_rate, 1.0)
+        self.assertEqual(replay.changed_count, 0)
+
+    def test_matching_trace_replay_no_match(self):
+        self._create_invoice_line(100, self.partner_a, "out_invoice")
+        st_line = self._create_st_line(amount=100, date="2020-06-01")
+        rule = self._create_reconcile_model(past_months_limit=1)
+        rule.with_context(reconcile_trace=True)._apply_rules(
+            st_line, st_line._retrieve_partner()
+        )
+        self.env["account.reconcile.trace"]._flush_traces()
+        traces = self.env["account.reconcile.trace"].search(
+            [("statement_line_id", "=", st_line.id)]
+        )
+        self.assertEqual(traces.status, "no_match")
+        self.assertFalse(traces.candidate_ids)
+        replay = (
+            self.env["account.reconcile.trace.replay"]
+            .with_context(active_ids=traces.ids)
+            .create({"past_months_limit": 12})
+        )
+        replay.action_replay()
+        self.assertEqual(replay.line_count, 1)
+        self.assertEqual(replay.traced_hit_rate, 0.0)
+        self.assertEqual(replay.replay_hit_rate, 1.0)
+        self.assertEqual(replay.changed_count, 1)
+        self.assertEqual(rule.past_months_limit, 1)
+
+    def test_matching_trace_replay_reconciled_line(self):
+        invl = self._create_invoice_line(100, self.partner_1, "out_invoice")
+        st_line = self._create_st_line(
+            amount=100, payment_ref=invl.move_id.name, partner_id=self.partner_1.id
+        )
+        rule = self.rule_1.with_context(reconcile_trace=True)
+        rule._apply_rules(st_line, st_line._retrieve_partner())
+        self.env["account.reconcile.trace"]._flush_traces()
+        traces = self.env["account.reconcile.trace"].search(
+            [("statement_line_id", "=", st_line.id)]
+        )
+        self.assertEqual(traces.candidate_ids, invl.ids)
+        # Reconcile the statement line with the traced candidate
+        _liquidity_lines, suspense_lines, _other_lines = st_line._seek_for_lines()
+        st_line.move_id.with_context(skip_account_move_synchronization=True).write(
+            {
+                "line_ids": [
+                    Command.update(
+                        suspense_lines.id,
+                        {
+                            "account_id": invl.account_id.id,
+                            "partner_id": invl.partner_id.id,
+                        },
+                    )
+                ]
+            }
+        )
+        (suspense_lines | invl).reconcile()
+        self.assertTrue(st_line.is_reconciled)
+        replay = (
+            self.env["account.reconcile.trace.replay"]
+            .with_context(active_ids=traces.ids)
+            .create({})
+        )
+        replay.action_replay()
+        self.assertEqual(replay.line_count, 0)
+        self.assertEqual(replay.skipped_count, 1)
+        self.assertEqual(replay.changed_count, 0)
+
+    def test_adaptive_order(self):
+        rule_a, rule_b, rule_c, rule_d = (
+            self._create_reconcile_model(sequence=sequence, adaptive_order=adaptive)
+            for sequence, adaptive in ((1, True), (2, True), (3, False), (4, True))
+        )
+        rules = rule_a | rule_b | rule_c | rule_d
+        self.env.cr.cache["account_reconcile_model_costs"] = {
+            self.bank_journal.id: {
+                rule_a.id: (10, 1, 10.0),
+                rule_b.id: (10, 9, 1.0),
+                rule_d.id: (10, 1, 1.0),
+            }
+        }
+        self.assertEqual(
+            rules._sort_by_observed_cost(self.bank_journal).ids,
+            (rule_b | rule_a | rule_c | rule_d).ids,
+        )
+        rules.adaptive_order = False
+        self.assertEqual(
+            rules._sort_by_observed_cost(self.bank_journal).ids, rules.ids
+        )
+
     def test_matching_fields_match_journal_ids(self):
         self.rule_1.match_text_location_label = False
         self.rule_1.match_journal_ids |= self.cash_line_1.journal_id
@@ -452,6 +595,17 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
             },
         )
 
+    def test_matching_fields_match_label_normalized(self):
+        st_line = self._create_st_line(
+            payment_ref="Paiement CAFÉ Dupré", partner_id=self.partner_1.id
+        )
+        self.assertEqual(st_line.matching_payment_ref, "paiement cafe dupre")
+        self.rule_1.match_label = "contains"
+        self.rule_1.match_label_param = "Café dupre"
+        self.assertTrue(self.rule_1._is_applicable_for(st_line, st_line.partner_id))
+        self.rule_1.match_label = "not_contains"
+        self.assertFalse(self.rule_1._is_applicable_for(st_line, st_line.partner_id))
+
     @freeze_time("2019-01-01")
     def test_zero_payment_tolerance(self):
         rule = self._create_reconcile_model(
@@ -1172,6 +1326,61 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
         # Matching is back thanks to "coincoin".
         self.assertEqual(st_line._retrieve_partner(), self.partner_1)
 
+    def test_retrieve_partner_accented_name(self):
+        partner = self.env["res.partner"].create({"name": "Société Dupré"})
+        self._create_invoice_line(1000.0, partner, "out_invoice")
+        st_line = self._create_st_line(
+            partner_id=None, payment_ref="Virement Société Dupré 42"
+        )
+        self.assertEqual(st_line._retrieve_partner(), partner)
+
+    def test_partner_mapping_batch(self):
+        st_line_1 = self._create_st_line(partner_id=None, payment_ref="toto42")
+        st_line_2 = self._create_st_line(partner_id=None, payment_ref="titi42")
+        st_line_3 = self._create_st_line(partner_id=None, payment_ref="tata42")
+        rule_1 = self._create_reconcile_model(
+            sequence=1,
+            partner_mapping_line_ids=[
+                {"partner_id": self.partner_1.id, "payment_ref_regex": "toto.*"}
+            ],
+        )
+        rule_2 = self._create_reconcile_model(
+            sequence=2,
+            partner_mapping_line_ids=[
+                {"partner_id": self.partner_2.id, "payment_ref_regex": "t.t.*"},
+                {"partner_id": self.partner_3.id, "payment_ref_regex": "titi.*"},
+            ],
+        )
+        self.assertEqual(
+            (rule_1 | rule_2)._get_partners_from_mapping(
+                st_line_1 | st_line_2 | st_line_3
+            ),
+            {
+                st_line_1.id: self.partner_1,
+                st_line_2.id: self.partner_2,
+                st_line_3.id: self.partner_2,
+            },
+        )
+
+    def test_matching_fuzzy_reference(self):
+        if not self.env.registry.has_trigram:
+            self.skipTest("The pg_trgm extension is not available.")
+        rule = self._create_reconcile_model(
+            match_text_location_reference=True,
+            match_fuzzy_reference=True,
+        )
+        invl = self._create_invoice_line(
+            1000.0, self.partner_a, "out_invoice", ref="ACMEORDER20190042"
+        )
+        st_line = self._create_st_line(amount=1000.0, payment_ref="ACMEORDER2019OO42")
+        self._check_statement_matching(rule, {st_line: {"amls": invl, "model": rule}})
+        # Neither the year nor a common word match all the entries of the year
+        st_line = self._create_st_line(amount=1000.0, payment_ref="Payment 2019")
+        self._check_statement_matching(rule, {st_line: {}})
+        rule.fuzzy_reference_threshold = 0.9
+        st_line = self._create_st_line(amount=1000.0, payment_ref="ACMEORDER2019OO42")
+        self._check_statement_matching(rule, {st_line: {}})
+
     def test_match_multi_currencies(self):
         """Ensure the matching of candidates is made using the right statement line
         currency. In this test, the value of the statement line is 100 USD = 300
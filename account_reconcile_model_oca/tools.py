@@ -0,0 +1,68 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Text helpers shared by the matching of the statement lines.
+
+They are pure functions of their arguments, so their results are cached:
+the same label or note is processed once, whatever the number of reconcile
+models and rules evaluated on it.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+from odoo.tools import html2plaintext
+
+SIGNIFICANT_TOKEN_SIZE = 4
+
+_NON_ALPHANUMERIC_RE = re.compile(r"[^0-9a-zA-Z\s]")
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+@lru_cache(maxsize=4096)
+def html_to_plaintext(html):
+    """Cached version of html2plaintext."""
+    return html2plaintext(html or "")
+
+
+@lru_cache(maxsize=1024)
+def compile_matching_regex(pattern):
+    """Cached version of re.compile."""
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=4096)
+def normalize_matching_text(text):
+    """Lowercase ``text`` and remove its accents."""
+    return "".join(
+        char
+        for char in unicodedata.normalize("NFKD", (text or "").lower())
+        if not unicodedata.combining(char)
+    )
+
+
+@lru_cache(maxsize=4096)
+def tokenize_matching_text(text_value):
+    """Split a statement line text into the tokens used by the invoice matching.
+
+    :param text_value: A text of the statement line.
+    :return: A tuple (numerical tokens, text tokens, single token) where
+        numerical tokens and text tokens are tuples of strings, and single token
+        tells whether the text holds only one token.
+    """
+    tokens = [_NON_ALPHANUMERIC_RE.sub("", token) for token in text_value.split()]
+    numerical_tokens = []
+    text_tokens = []
+    for token in tokens:
+        # The token is too short to be significant.
+        if len(token) < SIGNIFICANT_TOKEN_SIZE:
+            continue
+
+        text_tokens.append(token)
+        formatted_token = _NON_DIGIT_RE.sub("", token)
+
+        # The token is too short after formatting to be significant.
+        if len(formatted_token) < SIGNIFICANT_TOKEN_SIZE:
+            continue
+
+        numerical_tokens.append(formatted_token)
+    return tuple(numerical_tokens), tuple(text_tokens), len(tokens) == 1
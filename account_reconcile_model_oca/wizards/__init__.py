@@ -0,0 +1 @@
+from . import account_reconcile_trace_replay
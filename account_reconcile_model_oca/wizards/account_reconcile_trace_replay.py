@@ -0,0 +1,155 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import time
+
+from odoo import api, fields, models
+
+
+class AccountReconcileTraceReplay(models.TransientModel):
+    """Apply a reconcile model with other settings on the statement lines of
+    some traces, and compare the results with the traced ones.
+
+    The new settings are only applied inside a savepoint that is rolled back,
+    so the reconcile model is left untouched. The statement lines reconciled
+    since they were traced are skipped: their candidates are paid, so their
+    replay can't be compared with the trace.
+    """
+
+    _name = "account.reconcile.trace.replay"
+    _description = "Replay Reconcile Matching Traces"
+
+    trace_ids = fields.Many2many(
+        "account.reconcile.trace",
+        default=lambda self: self.env.context.get("active_ids", []),
+    )
+    model_id = fields.Many2one(
+        "account.reconcile.model",
+        required=True,
+        default=lambda self: self.env["account.reconcile.trace"]
+        .browse(self.env.context.get("active_ids", []))[:1]
+        .model_id,
+        domain=[("rule_type", "!=", "writeoff_button")],
+    )
+    past_months_limit = fields.Integer(
+        compute="_compute_model_settings", store=True, readonly=False
+    )
+    matching_order = fields.Selection(
+        selection=lambda self: self.env["account.reconcile.model"]
+        ._fields["matching_order"]
+        .selection,
+        compute="_compute_model_settings",
+        store=True,
+        readonly=False,
+    )
+    allow_payment_tolerance = fields.Boolean(
+        compute="_compute_model_settings", store=True, readonly=False
+    )
+    payment_tolerance_type = fields.Selection(
+        selection=lambda self: self.env["account.reconcile.model"]
+        ._fields["payment_tolerance_type"]
+        .selection,
+        compute="_compute_model_settings",
+        store=True,
+        readonly=False,
+    )
+    payment_tolerance_param = fields.Float(
+        compute="_compute_model_settings", store=True, readonly=False
+    )
+    state = fields.Selection(
+        [("draft", "Draft"), ("done", "Done")], default="draft", required=True
+    )
+    line_count = fields.Integer(readonly=True)
+    skipped_count = fields.Integer(
+        readonly=True, help="Traced statement lines reconciled since then."
+    )
+    changed_count = fields.Integer(
+        readonly=True, help="Statement lines whose candidates changed."
+    )
+    traced_hit_rate = fields.Float(readonly=True)
+    replay_hit_rate = fields.Float(readonly=True)
+    traced_duration = fields.Float(
+        readonly=True, digits=(16, 6), help="Average duration, in seconds."
+    )
+    replay_duration = fields.Float(
+        readonly=True, digits=(16, 6), help="Average duration, in seconds."
+    )
+
+    @api.depends("model_id")
+    def _compute_model_settings(self):
+        for wizard in self:
+            for fname in self._get_replay_model_fnames():
+                wizard[fname] = wizard.model_id[fname]
+
+    @api.model
+    def _get_replay_model_fnames(self):
+        return [
+            "past_months_limit",
+            "matching_order",
+            "allow_payment_tolerance",
+            "payment_tolerance_type",
+            "payment_tolerance_param",
+        ]
+
+    def action_replay(self):
+        self.ensure_one()
+        # Only keep the latest trace of each statement line
+        traces = {}
+        for trace in self.trace_ids.filtered(
+            lambda trace: trace.model_id == self.model_id
+        ).sorted():
+            traces.setdefault(trace.statement_line_id, trace)
+        skipped_count = 0
+        for st_line in list(traces):
+            if st_line.is_reconciled:
+                del traces[st_line]
+                skipped_count += 1
+        context = {"reconcile_trace": False, "reconcile_stage_stats": False}
+        reconcile_model = self.model_id.with_context(**context)
+        replays = {}
+        with self.env.cr.savepoint() as savepoint:
+            reconcile_model.write(
+                {fname: self[fname] for fname in self._get_replay_model_fnames()}
+            )
+            for st_line in traces:
+                st_line = st_line.with_context(**context)
+                # The traced duration does not include the partner retrieval
+                partner = st_line._retrieve_partner()
+                start = time.perf_counter()
+                res = reconcile_model._apply_rule(st_line, partner)
+                replays[st_line.id] = (res, time.perf_counter() - start)
+            savepoint.rollback()
+        self.env.registry.clear_cache()
+        self.env.invalidate_all()
+
+        line_count = len(traces)
+        traced_hits = replay_hits = changed_count = 0
+        for st_line, trace in traces.items():
+            res, _duration = replays[st_line.id]
+            traced_hit = trace.status in ("perfect", "partial", "write_off")
+            traced_hits += traced_hit
+            replay_hits += bool(res)
+            traced_ids = trace.candidate_ids if traced_hit else []
+            replay_ids = res["amls"].ids if res.get("amls") else []
+            if sorted(traced_ids or []) != sorted(replay_ids):
+                changed_count += 1
+        self.write(
+            {
+                "state": "done",
+                "line_count": line_count,
+                "skipped_count": skipped_count,
+                "changed_count": changed_count,
+                "traced_hit_rate": line_count and traced_hits / line_count,
+                "replay_hit_rate": line_count and replay_hits / line_count,
+                "traced_duration": line_count
+                and sum(trace.duration for trace in traces.values()) / line_count,
+                "replay_duration": line_count
+                and sum(duration for _res, duration in replays.values()) / line_count,
+            }
+        )
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
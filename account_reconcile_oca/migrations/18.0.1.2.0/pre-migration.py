@@ -0,0 +1,17 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # account.account.reconcile.data becomes a regular model with a unique
+    # (user_id, reconcile_id) constraint: keep only the latest row of each key.
+    cr.execute(
+        """
+        DELETE FROM account_account_reconcile_data data
+        USING account_account_reconcile_data newer
+        WHERE data.user_id = newer.user_id
+            AND data.reconcile_id = newer.reconcile_id
+            AND data.id < newer.id
+        """
+    )
@@ -1,7 +1,10 @@
 # Copyright 2023 Dixmit
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import json
+
 from odoo import api, fields, models
+from odoo.tools import SQL
 
 
 class CharId(fields.Id):
@@ -25,27 +28,28 @@ class AccountAccountReconcile(models.Model):
 
     @property
     def _table_query(self):
-        query = (
-            f"{self._select()} {self._from()} {self._where()} "
-            f"{self._groupby()} {self._having()}"
+        return SQL(
+            "%s %s %s %s %s",
+            self._select(),
+            self._from(),
+            self._where(),
+            self._groupby(),
+            self._having(),
         )
-        return query
+
+    def _get_account_name_sql(self):
+        # The field definition lives in the registry, so checking whether the
+        # name is translatable does not need any query on ir.model.fields.
+        if self.env["account.account"]._fields["name"].translate:
+            return SQL("a.name ->> %s", self.env.user.lang)
+        return SQL("a.name")
 
     def _select(self):
-        account_account_name_field = (
-            self.env["ir.model.fields"]
-            .sudo()
-            .search([("model", "=", "account.account"), ("name", "=", "name")])
-        )
-        account_name = (
-            f"a.name ->> '{self.env.user.lang}'"
-            if account_account_name_field.translate
-            else "a.name"
-        )
-        return f"""
+        return SQL(
+            """
             SELECT
                 min(aml.id) as id,
-                MAX({account_name}) as name,
+                MAX(%s) as name,
                 CASE
                     WHEN a.account_type in ('asset_receivable', 'liability_payable')
                         THEN aml.partner_id
@@ -68,73 +72,112 @@ class AccountAccountReconcile(models.Model):
                         ELSE 0 END
                     ) > 0
                 ) as active
-        """
+        """,
+            self._get_account_name_sql(),
+        )
 
     def _from(self):
-        return """
-            FROM
-                account_account a
-                INNER JOIN account_move_line aml ON aml.account_id = a.id
-                INNER JOIN account_move am ON am.id = aml.move_id
+        return SQL(
+            """
+                FROM
+                    account_account a
+                    INNER JOIN account_move_line aml ON aml.account_id = a.id
+                    INNER JOIN account_move am ON am.id = aml.move_id
             """
+        )
 
     def _where(self):
-        return """
-            WHERE a.reconcile
-                AND am.state = 'posted'
-        """
+        return SQL(
+            """
+                WHERE a.reconcile
+                    AND am.state = 'posted'
+            """
+        )
 
     def _groupby(self):
-        return """
-            GROUP BY
-                a.id,
-                CASE
-                    WHEN a.account_type in ('asset_receivable', 'liability_payable')
-                        THEN aml.partner_id
-                    ELSE NULL
-                END,
-                aml.currency_id,
-                am.company_id
-        """
+        return SQL(
+            """
+                GROUP BY
+                    a.id,
+                    CASE
+                        WHEN a.account_type in ('asset_receivable', 'liability_payable')
+                            THEN aml.partner_id
+                        ELSE NULL
+                    END,
+                    aml.currency_id,
+                    am.company_id
+            """
+        )
 
     def _having(self):
-        return """
+        return SQL("")
+
+    def _get_reconcile_data_records(self):
+        """Return the stored data of the current user for these records with
+        a single query.
         """
+        return self.env["account.account.reconcile.data"].search(
+            [
+                ("user_id", "=", self.env.user.id),
+                ("reconcile_id", "in", self._origin.ids),
+            ]
+        )
 
     def _compute_reconcile_data_info(self):
-        data_obj = self.env["account.account.reconcile.data"]
-        for record in self:
-            if self.env.context.get("default_account_move_lines"):
+        if self.env.context.get("default_account_move_lines"):
+            for record in self:
                 data = {
                     "data": [],
                     "counterparts": self.env.context.get("default_account_move_lines"),
                 }
                 record.reconcile_data_info = self._recompute_data(data)
-                continue
-            data_record = data_obj.search(
-                [("user_id", "=", self.env.user.id), ("reconcile_id", "=", record.id)]
-            )
+            return
+        data_records = {
+            data_record.reconcile_id: data_record
+            for data_record in self._get_reconcile_data_records()
+        }
+        for record in self:
+            data_record = data_records.get(record._origin.id)
             if data_record:
                 record.reconcile_data_info = data_record.data
             else:
                 record.reconcile_data_info = {"data": [], "counterparts": []}
 
     def _inverse_reconcile_data_info(self):
-        data_obj = self.env["account.account.reconcile.data"]
-        for record in self:
-            data_record = data_obj.search(
-                [("user_id", "=", self.env.user.id), ("reconcile_id", "=", record.id)]
+        # Upsert, so that concurrent saves of the same record (double click,
+        # several tabs) do not break the unique constraint
+        values = [
+            SQL(
+                "(%s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC', "
+                "NOW() AT TIME ZONE 'UTC')",
+                self.env.user.id,
+                record._origin.id,
+                json.dumps(record.reconcile_data_info),
+                self.env.uid,
+                self.env.uid,
             )
-            if data_record:
-                data_record.data = record.reconcile_data_info
-            else:
-                data_obj.create(
-                    {
-                        "reconcile_id": record.id,
-                        "user_id": self.env.user.id,
-                        "data": record.reconcile_data_info,
-                    }
+            for record in self
+        ]
+        if not values:
+            return
+        self.env["account.account.reconcile.data"].flush_model()
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO account_account_reconcile_data (
+                    user_id, reconcile_id, data,
+                    create_uid, write_uid, create_date, write_date
                 )
+                VALUES %s
+                ON CONFLICT (user_id, reconcile_id) DO UPDATE SET
+                    data = EXCLUDED.data,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date
+                """,
+                SQL(", ").join(values),
+            )
+        )
+        self.env["account.account.reconcile.data"].invalidate_model()
 
     @api.onchange("add_account_move_line_id")
     def _onchange_add_account_move_line(self):
@@ -143,11 +186,26 @@ class AccountAccountReconcile(models.Model):
             self.add_account_move_line_id = False
 
     def _add_account_move_line(self, move_line, keep_current=False):
+        self._add_account_move_lines(move_line, keep_current=keep_current)
+
+    def _add_account_move_lines(self, move_lines, keep_current=False):
+        """Add the journal items to the counterparts and recompute the data
+        once. Items that are already counterparts are kept if keep_current is
+        set, otherwise they are removed.
+        """
         data = self.reconcile_data_info
-        if move_line.id not in data["counterparts"]:
-            data["counterparts"].append(move_line.id)
-        elif not keep_current:
-            del data["counterparts"][data["counterparts"].index(move_line.id)]
+        current_ids = set(data["counterparts"])
+        to_remove = set()
+        counterparts = list(data["counterparts"])
+        for move_line_id in move_lines.ids:
+            if move_line_id not in current_ids:
+                current_ids.add(move_line_id)
+                counterparts.append(move_line_id)
+            elif not keep_current:
+                to_remove.add(move_line_id)
+        data["counterparts"] = [
+            line_id for line_id in counterparts if line_id not in to_remove
+        ]
         self.reconcile_data_info = self._recompute_data(data)
 
     @api.onchange("manual_reference", "manual_delete")
@@ -165,14 +223,36 @@ class AccountAccountReconcile(models.Model):
         self.manual_delete = False
         self.manual_reference = False
 
+    def _get_reconcile_line_fnames(self):
+        return [
+            "account_id",
+            "partner_id",
+            "move_id",
+            "company_id",
+            "currency_id",
+            "date",
+            "name",
+            "debit",
+            "credit",
+            "amount_residual",
+            "amount_residual_currency",
+            "analytic_distribution",
+        ]
+
     def _recompute_data(self, data):
         new_data = {"data": [], "counterparts": data["counterparts"]}
         counterparts = data["counterparts"]
+        # Browse all the counterparts together so that their fields, and the
+        # display names of their accounts, partners and moves, are read in
+        # batch instead of once per line.
+        move_lines = self.env["account.move.line"].browse(counterparts)
+        move_lines.fetch(self._get_reconcile_line_fnames())
+        self._prefetch_reconcile_display_names(move_lines)
         amount = 0.0
-        for line_id in counterparts:
-            max_amount = amount if line_id == counterparts[-1] else 0
+        for move_line in move_lines:
+            max_amount = amount if move_line.id == counterparts[-1] else 0
             lines = self._get_reconcile_line(
-                self.env["account.move.line"].browse(line_id),
+                move_line,
                 "other",
                 is_counterpart=True,
                 max_amount=max_amount,
@@ -191,23 +271,45 @@ class AccountAccountReconcile(models.Model):
             self.reconcile_data_info["counterparts"]
         )
         lines.reconcile()
-        data_record = self.env["account.account.reconcile.data"].search(
-            [("user_id", "=", self.env.user.id), ("reconcile_id", "=", self.id)]
-        )
-        data_record.unlink()
+        self._get_reconcile_data_records().unlink()
 
     def add_multiple_lines(self, domain):
         res = super().add_multiple_lines(domain)
         lines = self.env["account.move.line"].search(domain)
-        for line in lines:
-            self._add_account_move_line(line, keep_current=True)
+        self._add_account_move_lines(lines, keep_current=True)
         return res
 
 
-class AccountAccountReconcileData(models.TransientModel):
+class AccountAccountReconcileData(models.Model):
     _name = "account.account.reconcile.data"
     _description = "Reconcile data model to store user info"
 
-    user_id = fields.Many2one("res.users", required=True)
+    user_id = fields.Many2one("res.users", required=True, ondelete="cascade")
     reconcile_id = fields.Integer(required=True)
     data = fields.Serialized()
+
+    _sql_constraints = [
+        (
+            "user_reconcile_uniq",
+            "unique(user_id, reconcile_id)",
+            "Reconcile data must be unique per user and reconcile record.",
+        )
+    ]
+
+    @api.autovacuum
+    def _gc_reconcile_data(self):
+        """Delete the selections not modified for a week, and the ones of the
+        records that have been fully reconciled since then.
+        """
+        limit_date = fields.Datetime.subtract(fields.Datetime.now(), days=7)
+        self.sudo().search([("write_date", "<", limit_date)]).unlink()
+        data_records = self.sudo().search([])
+        existing_ids = set(
+            self.env["account.account.reconcile"]
+            .sudo()
+            .search([("id", "in", list(set(data_records.mapped("reconcile_id"))))])
+            .ids
+        )
+        data_records.filtered(
+            lambda data_record: data_record.reconcile_id not in existing_ids
+        ).unlink()
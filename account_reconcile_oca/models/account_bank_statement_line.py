@@ -2,7 +2,9 @@
 # Copyright 2025 Jacques-Etienne Baudoux (BCIM) <je@bcim.be>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import logging
 from collections import defaultdict
+from datetime import date
 
 from dateutil import rrule
 from dateutil.relativedelta import relativedelta
@@ -10,9 +12,11 @@ from dateutil.relativedelta import relativedelta
 from odoo import Command, _, api, fields, models, tools
 from odoo.exceptions import UserError
 from odoo.fields import first
-from odoo.tools import LazyTranslate, float_compare, float_is_zero, groupby
+from odoo.osv import expression
+from odoo.tools import SQL, LazyTranslate, float_compare, float_is_zero, groupby
 
 _lt = LazyTranslate(__name__, default_lang="en_US")
+_logger = logging.getLogger(__name__)
 
 
 class AccountBankStatementLine(models.Model):
@@ -125,6 +129,15 @@ class AccountBankStatementLine(models.Model):
     reconcile_aggregate = fields.Char(compute="_compute_reconcile_aggregate")
     aggregate_id = fields.Integer(compute="_compute_reconcile_aggregate")
     aggregate_name = fields.Char(compute="_compute_reconcile_aggregate")
+    reconcile_liquidity_line_ids = fields.Many2many(
+        "account.move.line", compute="_compute_reconcile_seek_lines"
+    )
+    reconcile_suspense_line_ids = fields.Many2many(
+        "account.move.line", compute="_compute_reconcile_seek_lines"
+    )
+    reconcile_other_line_ids = fields.Many2many(
+        "account.move.line", compute="_compute_reconcile_seek_lines"
+    )
 
     @api.model
     def _reconcile_aggregate_map(self):
@@ -146,18 +159,233 @@ class AccountBankStatementLine(models.Model):
             ),
         }
 
+    @api.model
+    def _get_reconcile_aggregate_date_sql(self, reconcile_aggregate, date_sql):
+        """Return the SQL expression of the first day of the day, week or
+        month bucket of ``date_sql``.
+        """
+        if reconcile_aggregate == "week":
+            lang = self.env["res.lang"]._lang_get(self.env.user.lang)
+            return SQL(
+                "(%s - ((EXTRACT(ISODOW FROM %s)::int - %s + 7) %% 7))",
+                date_sql,
+                date_sql,
+                int(lang.week_start),
+            )
+        if reconcile_aggregate == "month":
+            return SQL("date_trunc('month', %s)::date", date_sql)
+        return date_sql
+
+    def _get_reconcile_aggregate_values(self, reconcile_aggregate):
+        """Compute (aggregate_id, aggregate_name) of all the records at once.
+
+        Date buckets are computed in SQL and each distinct bucket label is
+        formatted once. New records, and aggregates not based on dates, go
+        through _reconcile_aggregate_map.
+        """
+        result = {}
+        records = self.filtered("id")
+        if records and reconcile_aggregate in ("day", "week", "month"):
+            query = records._search([("id", "in", records.ids)])
+            date_sql = self._get_reconcile_aggregate_date_sql(
+                reconcile_aggregate, self._field_to_sql(self._table, "date", query)
+            )
+            lang = self.env["res.lang"]._lang_get(self.env.user.lang)
+            rows = self.env.execute_query(
+                query.select(SQL.identifier(self._table, "id"), date_sql)
+            )
+            labels = {
+                date: (date.toordinal(), date.strftime(lang.date_format))
+                for date in {row[1] for row in rows}
+            }
+            result = {record_id: labels[date] for record_id, date in rows}
+        reconcile_aggregate_map = self._reconcile_aggregate_map()
+        for record in self:
+            if record.id not in result:
+                result[record.id] = reconcile_aggregate_map[reconcile_aggregate](
+                    record
+                )
+        return result
+
     @api.depends("company_id", "journal_id")
     def _compute_reconcile_aggregate(self):
-        reconcile_aggregate_map = self._reconcile_aggregate_map()
+        records_by_aggregate = defaultdict(lambda: self.browse())
         for record in self:
             reconcile_aggregate = (
                 record.journal_id.reconcile_aggregate
                 or record.company_id.reconcile_aggregate
             )
             record.reconcile_aggregate = reconcile_aggregate
-            record.aggregate_id, record.aggregate_name = reconcile_aggregate_map[
-                reconcile_aggregate
-            ](record)
+            records_by_aggregate[reconcile_aggregate] |= record
+        for reconcile_aggregate, records in records_by_aggregate.items():
+            values = records._get_reconcile_aggregate_values(reconcile_aggregate)
+            for record in records:
+                record.aggregate_id, record.aggregate_name = values[record.id]
+
+    @api.model
+    def get_reconcile_aggregate_totals(self, journal_id, domain=None):
+        """Return the totals of each aggregate of the journal, computed in SQL
+        without loading the statement lines.
+
+        :param journal_id: id of the journal whose aggregation is used.
+        :param domain: optional extra domain on the statement lines.
+        :return: a list of dicts with the ``id`` and ``name`` of the aggregate,
+            the ``count`` of lines, the sum of their ``amount``, the
+            ``unreconciled_count`` and, for statements, the ``balance``.
+        """
+        journal = self.env["account.journal"].browse(journal_id)
+        reconcile_aggregate = (
+            journal.reconcile_aggregate or journal.company_id.reconcile_aggregate
+        )
+        if not reconcile_aggregate:
+            return []
+        query = self._search(
+            expression.AND([domain or [], [("journal_id", "=", journal.id)]])
+        )
+        if reconcile_aggregate == "statement":
+            bucket_sql = self._field_to_sql(self._table, "statement_id", query)
+        else:
+            bucket_sql = self._get_reconcile_aggregate_date_sql(
+                reconcile_aggregate, self._field_to_sql(self._table, "date", query)
+            )
+        rows = self.env.execute_query(
+            SQL(
+                "%s GROUP BY 1 ORDER BY 1 DESC",
+                query.select(
+                    bucket_sql,
+                    SQL("COUNT(*)"),
+                    SQL("SUM(%s)", self._field_to_sql(self._table, "amount", query)),
+                    SQL(
+                        "COUNT(*) FILTER (WHERE %s IS NOT TRUE)",
+                        self._field_to_sql(self._table, "is_reconciled", query),
+                    ),
+                ),
+            )
+        )
+        lang = self.env["res.lang"]._lang_get(self.env.user.lang)
+        statement_ids = []
+        if reconcile_aggregate == "statement":
+            statement_ids = [row[0] for row in rows if row[0]]
+        statements = {
+            statement.id: statement
+            for statement in self.env["account.bank.statement"].browse(statement_ids)
+        }
+        totals = []
+        for bucket, count, amount, unreconciled_count in rows:
+            values = {
+                "id": False,
+                "name": False,
+                "count": count,
+                "amount": amount,
+                "unreconciled_count": unreconciled_count,
+                "balance": False,
+            }
+            if reconcile_aggregate == "statement" and bucket:
+                statement = statements[bucket]
+                values.update(
+                    id=statement.id,
+                    name=statement.name,
+                    balance=statement.balance_end_real,
+                )
+            elif bucket:
+                values.update(
+                    id=bucket.toordinal(), name=bucket.strftime(lang.date_format)
+                )
+            totals.append(values)
+        return totals
+
+    @api.model
+    def _get_reconcile_aggregate_page_domain(self, reconcile_aggregate, aggregate_ids):
+        """Return the domain of the statement lines of the given aggregates, so
+        that their totals are computed without scanning the other lines.
+        """
+        if reconcile_aggregate == "statement":
+            return [("statement_id", "in", aggregate_ids)]
+        starts = [date.fromordinal(aggregate_id) for aggregate_id in aggregate_ids]
+        period = {
+            "day": relativedelta(days=1),
+            "week": relativedelta(weeks=1),
+            "month": relativedelta(months=1),
+        }[reconcile_aggregate]
+        return [("date", ">=", min(starts)), ("date", "<", max(starts) + period)]
+
+    @api.model
+    def get_reconcile_cards(
+        self, domain, specification, cursor=False, limit=80, count_limit=None
+    ):
+        """Return a page of kanban cards, ordered by (date, internal_index)
+        descending, along with the totals of the aggregates of the page.
+
+        Pages are selected with a keyset condition on the last card of the
+        previous page instead of an offset, so every page costs the same.
+
+        :param domain: search domain of the kanban view.
+        :param specification: fields to read, as for web_search_read.
+        :param cursor: [date, internal_index] of the last card already loaded,
+            as returned in ``next_cursor``, or False for the first page.
+        :param limit: maximum number of cards to return.
+        :param count_limit: maximum number of lines to count.
+        :return: a dict with the ``records`` and ``length`` expected by the
+            kanban, the ``aggregates`` totals of the page (see
+            get_reconcile_aggregate_totals) and the ``next_cursor`` (False when
+            there is no next page).
+        """
+        page_domain = domain
+        if cursor:
+            cursor_date, internal_index = cursor
+            page_domain = expression.AND(
+                [
+                    domain,
+                    [
+                        "|",
+                        ("date", "<", cursor_date),
+                        "&",
+                        ("date", "=", cursor_date),
+                        ("internal_index", "<", internal_index),
+                    ],
+                ]
+            )
+        records = self.search(
+            page_domain, limit=limit, order="date desc, internal_index desc"
+        )
+        aggregates = []
+        journal = records.journal_id
+        reconcile_aggregate = len(journal) == 1 and (
+            journal.reconcile_aggregate or journal.company_id.reconcile_aggregate
+        )
+        aggregate_ids = [
+            aggregate_id
+            for aggregate_id in records.mapped("aggregate_id")
+            if aggregate_id
+        ]
+        if reconcile_aggregate and aggregate_ids:
+            aggregates = [
+                totals
+                for totals in self.get_reconcile_aggregate_totals(
+                    journal.id,
+                    expression.AND(
+                        [
+                            domain,
+                            self._get_reconcile_aggregate_page_domain(
+                                reconcile_aggregate, aggregate_ids
+                            ),
+                        ]
+                    ),
+                )
+                if totals["id"] in aggregate_ids
+            ]
+        next_cursor = False
+        if len(records) == limit:
+            next_cursor = [
+                fields.Date.to_string(records[-1].date),
+                records[-1].internal_index,
+            ]
+        return {
+            "records": records.web_read(specification),
+            "length": self.search_count(domain, limit=count_limit),
+            "aggregates": aggregates,
+            "next_cursor": next_cursor,
+        }
 
     def save(self):
         return {"type": "ir.actions.act_window_close"}
@@ -211,21 +439,35 @@ class AccountBankStatementLine(models.Model):
             self.add_account_move_line_id = False
 
     def _add_account_move_line(self, move_line, keep_current=False):
-        data = self.reconcile_data_info["data"]
+        self._add_account_move_lines(move_line, keep_current=keep_current)
+
+    def _add_account_move_lines(self, move_lines, keep_current=False):
+        """Add the journal items as counterparts of the statement line.
+
+        The pending amount is computed once from the current data and kept up
+        to date while the new lines are built, and the suspense line is only
+        recomputed at the end. Items that are already counterparts are kept
+        if keep_current is set, otherwise they are removed.
+        """
+        currency = self._get_reconcile_currency()
+        move_line_ids = set(move_lines.ids)
+        self._prefetch_reconcile_display_names(move_lines)
+        current_ids = set()
         new_data = []
-        is_new_line = True
         pending_amount = 0.0
-        currency = self._get_reconcile_currency()
-        for line in data:
+        for line in self.reconcile_data_info["data"]:
             if line["kind"] != "suspense":
                 pending_amount += self._get_amount_currency(line, currency)
-            if move_line.id in line.get("counterpart_line_ids", []):
-                is_new_line = False
+            line_ids = move_line_ids.intersection(line.get("counterpart_line_ids", []))
+            if line_ids:
+                current_ids |= line_ids
                 if keep_current:
                     new_data.append(line)
             else:
                 new_data.append(line)
-        if is_new_line:
+        for move_line in move_lines:
+            if move_line.id in current_ids:
+                continue
             reconcile_auxiliary_id, lines = self._get_reconcile_line(
                 move_line,
                 "other",
@@ -234,6 +476,9 @@ class AccountBankStatementLine(models.Model):
                 move=True,
             )
             new_data += lines
+            pending_amount += sum(
+                self._get_amount_currency(line, currency) for line in lines
+            )
         self.reconcile_data_info = self._recompute_suspense_line(
             new_data,
             self.reconcile_data_info["reconcile_auxiliary_id"],
@@ -347,6 +592,29 @@ class AccountBankStatementLine(models.Model):
             or self.analytic_distribution != line.get("analytic_distribution", False)
         )
 
+    @api.depends(
+        "move_id.line_ids.account_id.account_type",
+        "journal_id.default_account_id",
+        "journal_id.suspense_account_id",
+    )
+    def _compute_reconcile_seek_lines(self):
+        for record in self:
+            (
+                record.reconcile_liquidity_line_ids,
+                record.reconcile_suspense_line_ids,
+                record.reconcile_other_line_ids,
+            ) = super(AccountBankStatementLine, record)._seek_for_lines()
+
+    def _seek_for_lines(self):
+        # The split is kept in cache until the lines of the move change, as it
+        # is needed many times for the same statement line during one operation
+        self.ensure_one()
+        return (
+            self.reconcile_liquidity_line_ids,
+            self.reconcile_suspense_line_ids,
+            self.reconcile_other_line_ids,
+        )
+
     def _check_reconcile_data_changed(self):
         self.ensure_one()
         data = self.reconcile_data_info.get("data", [])
@@ -589,9 +857,24 @@ class AccountBankStatementLine(models.Model):
         partner = (
             reconcile_model._get_partner_from_mapping(self) or self._retrieve_partner()
         )
-        for line in reconcile_model._get_write_off_move_lines_dict(
+        write_off_lines = reconcile_model._get_write_off_move_lines_dict(
             -liquidity_amount, partner.id, label=self.payment_ref
-        ):
+        )
+        account_names = self._get_reconcile_display_names(
+            self.env["account.account"].browse(
+                [line["account_id"] for line in write_off_lines]
+            )
+        )
+        partner_names = self._get_reconcile_display_names(
+            self.env["res.partner"].browse(
+                [
+                    line["partner_id"]
+                    for line in write_off_lines
+                    if line.get("partner_id")
+                ]
+            )
+        )
+        for line in write_off_lines:
             new_line = line.copy()
             new_line["partner_id"] = (
                 partner and [partner.id, partner.display_name] or False
@@ -621,9 +904,7 @@ class AccountBankStatementLine(models.Model):
                     "kind": "other",
                     "account_id": [
                         line["account_id"],
-                        self.env["account.account"]
-                        .browse(line["account_id"])
-                        .display_name,
+                        account_names[line["account_id"]],
                     ],
                     "date": fields.Date.to_string(self.date),
                     "line_currency_id": currency.id,
@@ -636,7 +917,7 @@ class AccountBankStatementLine(models.Model):
             if line.get("partner_id"):
                 new_line["partner_id"] = (
                     line["partner_id"],
-                    self.env["res.partner"].browse(line["partner_id"]).display_name,
+                    partner_names[line["partner_id"]],
                 )
             elif self.partner_id:
                 new_line["partner_id"] = (
@@ -648,6 +929,7 @@ class AccountBankStatementLine(models.Model):
 
     def _default_reconcile_data(self, from_unreconcile=False):
         liquidity_lines, suspense_lines, other_lines = self._seek_for_lines()
+        self._prefetch_reconcile_display_names(liquidity_lines | other_lines)
         data = []
         reconcile_auxiliary_id = 1
         for line in liquidity_lines:
@@ -659,20 +941,13 @@ class AccountBankStatementLine(models.Model):
             )
             data += lines
         if not from_unreconcile:
-            res = (
-                self.env["account.reconcile.model"]
-                .search(
-                    [
-                        (
-                            "rule_type",
-                            "in",
-                            ["invoice_matching", "writeoff_suggestion"],
-                        ),
-                        ("company_id", "=", self.company_id.id),
-                    ]
+            reconcile_models = self.env["account.reconcile.model"]
+            reconcile_models = reconcile_models.browse(
+                reconcile_models._get_reconcile_model_ids(
+                    self.company_id.id, self.journal_id.id
                 )
-                ._apply_rules(self, self._retrieve_partner())
             )
+            res = reconcile_models._apply_rules(self, self._retrieve_partner())
             if res and res.get("status", "") == "write_off":
                 return self._recompute_suspense_line(
                     *self._reconcile_data_by_model(
@@ -681,6 +956,7 @@ class AccountBankStatementLine(models.Model):
                     self.manual_reference,
                 )
             elif res and res.get("amls"):
+                self._prefetch_reconcile_display_names(res["amls"])
                 # TODO should be signed in currency get_reconcile_currency
                 amount = self.amount_total_signed
                 for line in res.get("amls", []):
@@ -799,9 +1075,12 @@ class AccountBankStatementLine(models.Model):
     def reconcile_bank_line(self):
         self.ensure_one()
         self.reconcile_mode = self.journal_id.reconcile_mode
-        result = getattr(self, f"_reconcile_bank_line_{self.reconcile_mode}")(
-            self._prepare_reconcile_line_data(self.reconcile_data_info["data"])
-        )
+        with self.env["account.reconcile.stage.stat"]._span(
+            f"reconcile_bank_line_{self.reconcile_mode}", journal=self.journal_id
+        ):
+            result = getattr(self, f"_reconcile_bank_line_{self.reconcile_mode}")(
+                self._prepare_reconcile_line_data(self.reconcile_data_info["data"])
+            )
         self.reconcile_data = False
         return result
 
@@ -826,19 +1105,18 @@ class AccountBankStatementLine(models.Model):
                     "line_ids": lines_to_remove,
                 }
             )
-            for line_vals in data:
-                if line_vals["kind"] == "liquidity":
-                    continue
-                line = (
-                    self.env["account.move.line"]
-                    .with_context(
-                        check_move_validity=False,
-                        skip_sync_invoice=True,
-                        skip_invoice_sync=True,
-                        validate_analytic=True,
-                    )
-                    .create(self._reconcile_move_line_vals(line_vals))
+            data = [line_vals for line_vals in data if line_vals["kind"] != "liquidity"]
+            lines = (
+                self.env["account.move.line"]
+                .with_context(
+                    check_move_validity=False,
+                    skip_sync_invoice=True,
+                    skip_invoice_sync=True,
+                    validate_analytic=True,
                 )
+                .create([self._reconcile_move_line_vals(vals) for vals in data])
+            )
+            for line_vals, line in zip(data, lines, strict=True):
                 if line_vals.get("counterpart_line_ids"):
                     to_reconcile.append(
                         self.env["account.move.line"].browse(
@@ -846,8 +1124,9 @@ class AccountBankStatementLine(models.Model):
                         )
                         + line
                     )
-        for reconcile_items in to_reconcile:
-            reconcile_items.reconcile()
+        if to_reconcile:
+            # All the counterparts are reconciled at once
+            self.env["account.move.line"]._reconcile_plan(to_reconcile)
 
     def _reconcile_bank_line_keep_move_vals(self):
         return {
@@ -980,24 +1259,37 @@ class AccountBankStatementLine(models.Model):
         result._auto_reconcile()
         return result
 
+    @api.model
+    def import_lines(self, vals_iterable, chunk_size=1000):
+        """Create statement lines from an iterable of values, chunk by chunk.
+
+        Each chunk is created, auto reconciled and flushed before the next one
+        is consumed, and the caches are cleared in between, so that memory does
+        not grow with the number of lines imported.
+
+        :param vals_iterable: Iterable (possibly a generator) of create values.
+        :param chunk_size: Number of lines created at once.
+        :return: The number of lines created.
+        """
+        count = 0
+        for chunk in tools.split_every(chunk_size, vals_iterable, list):
+            self.create(chunk)
+            self.env.flush_all()
+            self.env.invalidate_all()
+            count += len(chunk)
+            _logger.info("Imported %s bank statement lines", count)
+        return count
+
     def _auto_reconcile(self):
         """Try to auto reconcile records that are not yet reconciled"""
         non_reconciled = self.filtered(lambda rec: not rec.is_reconciled)
         lines_by_journal = groupby(non_reconciled, key=lambda r: r.journal_id)
         for journal, ilines in lines_by_journal:
-            models = self.env["account.reconcile.model"].search(
-                [
-                    (
-                        "rule_type",
-                        "in",
-                        ["invoice_matching", "writeoff_suggestion"],
-                    ),
-                    ("company_id", "in", journal.company_id.ids),
-                    ("auto_reconcile", "=", True),
-                    "|",
-                    ("match_journal_ids", "=", False),
-                    ("match_journal_ids", "in", journal.id),
-                ]
+            models = self.env["account.reconcile.model"]
+            models = models.browse(
+                models._get_reconcile_model_ids(
+                    journal.company_id.id, journal.id, auto_only=True
+                )
             )
             for record in ilines:
                 record._do_auto_reconcile(models)
@@ -1029,6 +1321,7 @@ class AccountBankStatementLine(models.Model):
                 self.manual_reference,
             )
         elif res.get("amls"):
+            self._prefetch_reconcile_display_names(res["amls"])
             amount = self.amount_currency or self.amount
             for line in res.get("amls", []):
                 reconcile_auxiliary_id, line_datas = self._get_reconcile_line(
@@ -1043,9 +1336,15 @@ class AccountBankStatementLine(models.Model):
             )
         if not data.get("can_reconcile"):
             return
-        getattr(self, f"_reconcile_bank_line_{self.journal_id.reconcile_mode}")(
-            self._prepare_reconcile_line_data(data["data"])
-        )
+        reconcile_mode = self.journal_id.reconcile_mode
+        with self.env["account.reconcile.stage.stat"]._span(
+            f"reconcile_bank_line_{reconcile_mode}",
+            journal=self.journal_id,
+            model=res["model"],
+        ):
+            getattr(self, f"_reconcile_bank_line_{reconcile_mode}")(
+                self._prepare_reconcile_line_data(data["data"])
+            )
 
     def _synchronize_to_moves(self, changed_fields):
         """We want to avoid to change stuff (mainly amounts ) in accounting entries
@@ -1073,22 +1372,35 @@ class AccountBankStatementLine(models.Model):
                 "currency_id",
             )
         ):
-            for st_line in self.with_context(skip_account_move_synchronization=True):
-                (
-                    liquidity_lines,
-                    suspense_lines,
-                    _other_lines,
-                ) = st_line._seek_for_lines()
-                line_vals = {"partner_id": st_line.partner_id.id}
-                line_ids_commands = [(1, liquidity_lines.id, line_vals)]
-                if suspense_lines:
-                    line_ids_commands.append((1, suspense_lines.id, line_vals))
-                st_line_vals = {"line_ids": line_ids_commands}
-                if st_line.move_id.partner_id != st_line.partner_id:
-                    st_line_vals["partner_id"] = st_line.partner_id.id
-                st_line.move_id.with_context(skip_readonly_check=True).write(
-                    st_line_vals
+            # Group the lines by partner, so that a partner change on many
+            # lines is written once per partner instead of once per line.
+            for (partner, move_partner_changed), st_lines in groupby(
+                self.with_context(skip_account_move_synchronization=True),
+                key=lambda st_line: (
+                    st_line.partner_id,
+                    st_line.move_id.partner_id != st_line.partner_id,
+                ),
+            ):
+                line_ids = []
+                for st_line in st_lines:
+                    (
+                        liquidity_lines,
+                        suspense_lines,
+                        _other_lines,
+                    ) = st_line._seek_for_lines()
+                    line_ids += liquidity_lines.ids + suspense_lines.ids
+                line_vals = {"partner_id": partner.id}
+                moves_vals = {
+                    "line_ids": [
+                        Command.update(line_id, line_vals) for line_id in line_ids
+                    ]
+                }
+                if move_partner_changed:
+                    moves_vals["partner_id"] = partner.id
+                moves = self.env["account.move"].browse(
+                    [st_line.move_id.id for st_line in st_lines]
                 )
+                moves.with_context(skip_readonly_check=True).write(moves_vals)
         else:
             super()._synchronize_to_moves(changed_fields=changed_fields)
 
@@ -1105,10 +1417,17 @@ class AccountBankStatementLine(models.Model):
         ):
             return
         # reset reconcile_data_info if amounts are not consistent anymore with the
-        # amounts of the accounting entries
-        for st_line in self:
-            if st_line._check_reconcile_data_changed():
-                st_line.reconcile_data_info = st_line._default_reconcile_data()
+        # amounts of the accounting entries. The default data is computed again
+        # only when the lines are displayed in the widget.
+        self.invalidate_recordset(["reconcile_data_info", "can_reconcile"])
+        st_lines = self.filtered(
+            lambda st_line: st_line.reconcile_data
+            and not st_line.is_reconciled
+            and st_line._check_reconcile_data_changed()
+        )
+        st_lines.with_context(skip_account_move_synchronization=True).write(
+            {"reconcile_data": False}
+        )
 
     def _prepare_reconcile_line_data(self, lines):
         new_lines = []
@@ -1333,8 +1652,7 @@ class AccountBankStatementLine(models.Model):
     def add_multiple_lines(self, domain):
         res = super().add_multiple_lines(domain)
         lines = self.env["account.move.line"].search(domain)
-        for line in lines:
-            self._add_account_move_line(line, keep_current=True)
+        self._add_account_move_lines(lines, keep_current=True)
         return res
 
     def _retrieve_partner(self):
@@ -1342,5 +1660,5 @@ class AccountBankStatementLine(models.Model):
             # This hook can be used, for example, when importing files.
             # With large databases, we already have the information, moreover,
             # the data might be preloaded, so it has no sense to import it again
-            return self.partner_id
+            return self.partner_id or self._get_partner_from_reconcile_hints()
         return super()._retrieve_partner()
@@ -26,12 +26,27 @@ class AccountJournal(models.Model):
         help="Aggregation to use on reconcile view",
     )
 
+    def _has_statement_lines_to_reconcile(self):
+        """Same criteria as number_to_reconcile on the journal dashboard, without
+        computing the whole dashboard.
+        """
+        self.ensure_one()
+        return bool(
+            self.env["account.bank.statement.line"].search_count(
+                [
+                    ("journal_id", "=", self.id),
+                    ("company_id", "in", self.env.companies.ids),
+                    ("is_reconciled", "=", False),
+                    ("checked", "=", True),
+                    ("state", "=", "posted"),
+                ],
+                limit=1,
+            )
+        )
+
     def get_rainbowman_message(self):
         self.ensure_one()
-        if (
-            self._get_journal_dashboard_data_batched()[self.id]["number_to_reconcile"]
-            > 0
-        ):
+        if self._has_statement_lines_to_reconcile():
             return False
         return _("Well done! Everything has been reconciled")
 
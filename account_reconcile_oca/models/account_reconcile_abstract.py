@@ -36,6 +36,27 @@ class AccountReconcileAbstract(models.AbstractModel):
     def _get_reconcile_currency(self):
         return self.currency_id or self.company_id._currency_id
 
+    def _get_reconcile_display_names(self, records):
+        """Return the display names of ``records`` by id.
+
+        The names of the whole recordset are computed together and stay in the
+        ORM cache for the rest of the request, so asking for them again, or
+        reading display_name on any of these records, does not compute them
+        again.
+        """
+        return dict(zip(records.ids, records.mapped("display_name")))
+
+    def _prefetch_reconcile_display_names(self, move_lines):
+        """Resolve in batch the account, partner and move names that
+        _get_reconcile_line embeds for each of ``move_lines``.
+        """
+        for records in (
+            move_lines.account_id,
+            move_lines.partner_id,
+            move_lines.move_id,
+        ):
+            self._get_reconcile_display_names(records)
+
     def _get_reconcile_line(
         self,
         line,
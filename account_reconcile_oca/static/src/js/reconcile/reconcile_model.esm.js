@@ -0,0 +1,45 @@
+import {getFieldsSpec} from "@web/model/relational_model/utils";
+import {RelationalModel} from "@web/model/relational_model/relational_model";
+
+export class ReconcileModel extends RelationalModel {
+    setup() {
+        super.setup(...arguments);
+        // Keyset cursors of the statement lines, by domain and offset
+        this.reconcileCursors = {};
+        this.reconcileAggregateTotals = null;
+    }
+    async _loadUngroupedList(config) {
+        const domainKey = JSON.stringify(config.domain);
+        const cursors = this.reconcileCursors[domainKey] || {};
+        if (
+            config.resModel !== "account.bank.statement.line" ||
+            config.orderBy.length ||
+            (config.offset && !cursors[config.offset])
+        ) {
+            this.reconcileAggregateTotals = null;
+            return super._loadUngroupedList(...arguments);
+        }
+        const result = await this.orm.call(
+            config.resModel,
+            "get_reconcile_cards",
+            [config.domain, getFieldsSpec(config.activeFields, config.fields)],
+            {
+                cursor: config.offset ? cursors[config.offset] : false,
+                limit: config.limit,
+                count_limit:
+                    config.countLimit === Number.MAX_SAFE_INTEGER
+                        ? undefined
+                        : config.countLimit + 1,
+                context: {bin_size: true, ...config.context},
+            }
+        );
+        if (result.next_cursor) {
+            cursors[config.offset + result.records.length] = result.next_cursor;
+        }
+        this.reconcileCursors = {[domainKey]: cursors};
+        this.reconcileAggregateTotals = Object.fromEntries(
+            result.aggregates.map((total) => [total.id, total])
+        );
+        return {records: result.records, length: result.length};
+    }
+}
@@ -2,12 +2,39 @@ import {KanbanRenderer} from "@web/views/kanban/kanban_renderer";
 import {ReconcileKanbanRecord} from "./reconcile_kanban_record.esm.js";
 import {formatMonetary} from "@web/views/fields/formatters";
 import {useService} from "@web/core/utils/hooks";
+const {onWillStart, onWillUpdateProps} = owl;
 
 export class ReconcileRenderer extends KanbanRenderer {
     setup() {
         super.setup();
         this.action = useService("action");
         this.orm = useService("orm");
+        this.aggregateTotals = {};
+        onWillStart(() => this.loadAggregateTotals(this.props));
+        onWillUpdateProps((nextProps) => this.loadAggregateTotals(nextProps));
+    }
+    async loadAggregateTotals(props) {
+        if (props.list.model.reconcileAggregateTotals) {
+            // Computed along with the page by get_reconcile_cards
+            this.aggregateTotals = props.list.model.reconcileAggregateTotals;
+            return;
+        }
+        const journalId = this.env.parentController.journalId;
+        if (
+            !journalId ||
+            this.env.parentController.props.resModel !== "account.bank.statement.line"
+        ) {
+            return;
+        }
+        const totals = await this.orm.call(
+            "account.bank.statement.line",
+            "get_reconcile_aggregate_totals",
+            [journalId, props.list.domain],
+            {context: props.list.context}
+        );
+        this.aggregateTotals = Object.fromEntries(
+            totals.map((total) => [total.id, total])
+        );
     }
     getAggregates() {
         if (
@@ -24,9 +51,12 @@ export class ReconcileRenderer extends KanbanRenderer {
                 (!aggregates.length ||
                     aggregates[aggregates.length - 1].id !== aggregateId)
             ) {
+                const totals = this.aggregateTotals[aggregateId] || {};
                 aggregates.push({
                     id: aggregateId,
                     name: record.data.aggregate_name,
+                    count: totals.count,
+                    unreconciledCount: totals.unreconciled_count,
                     balance: record.data.statement_balance_end_real,
                     balanceStr: formatMonetary(record.data.statement_balance_end_real, {
                         currencyId: record.data.currency_id[0],
@@ -1,10 +1,12 @@
 import {ReconcileController} from "./reconcile_controller.esm.js";
+import {ReconcileModel} from "./reconcile_model.esm.js";
 import {ReconcileRenderer} from "./reconcile_renderer.esm.js";
 import {kanbanView} from "@web/views/kanban/kanban_view";
 import {registry} from "@web/core/registry";
 
 export const reconcileView = {
     ...kanbanView,
+    Model: ReconcileModel,
     Renderer: ReconcileRenderer,
     Controller: ReconcileController,
     buttonTemplate: "account_reconcile.ReconcileView.Buttons",
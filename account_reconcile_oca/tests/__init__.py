@@ -1,2 +1,4 @@
 from . import test_bank_account_reconcile
 from . import test_account_reconcile
+from . import test_reconcile_benchmark
+from . import test_query_count
@@ -0,0 +1,105 @@
+import random
+import time
+
+from odoo import Command
+
+from odoo.addons.account_reconcile_model_oca.tests.common import (
+    TestAccountReconciliationCommon,
+)
+
+
+class TestReconcileLedgerCommon(TestAccountReconciliationCommon):
+    """Common class generating synthetic ledgers, used to measure the
+    reconciliation on realistic volumes.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.bank_journal_euro.suspense_account_id = (
+            cls.env.company.account_journal_suspense_account_id
+        )
+
+    @classmethod
+    def _generate_ledger(
+        cls,
+        partner_count=10,
+        invoice_count=50,
+        line_count=30,
+        currency_ratio=0.0,
+        noise_ratio=0.0,
+        seed=42,
+    ):
+        """Generate open customer invoices and the bank statement lines paying
+        them.
+
+        :param partner_count: Number of partners the invoices are spread on.
+        :param invoice_count: Number of open invoices.
+        :param line_count: Number of statement lines, each one paying an invoice.
+        :param currency_ratio: Ratio of invoices (and payments) in USD.
+        :param noise_ratio: Ratio of statement lines whose label does not
+            contain the invoice reference.
+        :param seed: Seed of the random generator, for reproducible ledgers.
+        :return: A tuple (partners, invoices, statement lines).
+        """
+        rng = random.Random(seed)
+        date = time.strftime("%Y-07-01")
+        partners = cls.env["res.partner"].create(
+            [
+                {"name": f"Benchmark Partner {index}", "is_company": True}
+                for index in range(partner_count)
+            ]
+        )
+        invoices = (
+            cls.env["account.move"]
+            .with_context(default_move_type="out_invoice")
+            .create(
+                [
+                    {
+                        "move_type": "out_invoice",
+                        "partner_id": partners[index % partner_count].id,
+                        "invoice_date": date,
+                        "date": date,
+                        "currency_id": cls.currency_usd_id
+                        if rng.random() < currency_ratio
+                        else cls.currency_euro_id,
+                        "invoice_line_ids": [
+                            Command.create(
+                                {
+                                    "name": f"Benchmark product {index}",
+                                    "quantity": 1,
+                                    "price_unit": rng.randint(10, 5000),
+                                    "tax_ids": [Command.set([])],
+                                }
+                            )
+                        ],
+                    }
+                    for index in range(invoice_count)
+                ]
+            )
+        )
+        invoices.action_post()
+        line_vals = []
+        for index in range(line_count):
+            invoice = invoices[index % invoice_count]
+            if rng.random() < noise_ratio:
+                payment_ref = f"TRANSFER {rng.randint(10**6, 10**7)} THANK YOU"
+            else:
+                payment_ref = f"PAYMENT {invoice.name} {invoice.partner_id.name}"
+            vals = {
+                "journal_id": cls.bank_journal_euro.id,
+                "date": date,
+                "payment_ref": payment_ref,
+                "amount": invoice.amount_total_signed,
+            }
+            if invoice.currency_id != cls.company.currency_id:
+                vals.update(
+                    {
+                        "foreign_currency_id": invoice.currency_id.id,
+                        "amount_currency": invoice.amount_total,
+                    }
+                )
+            line_vals.append(vals)
+        st_lines = cls.env["account.bank.statement.line"].create(line_vals)
+        return partners, invoices, st_lines
@@ -168,6 +168,35 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         )
         self.assertFalse(reconcile_account)
 
+    def test_reconcile_account_name(self):
+        account = self.non_current_assets_account
+        reconcile_account = self.env["account.account.reconcile"].search(
+            [("account_id", "=", account.id)]
+        )
+        self.assertEqual(reconcile_account.name, account.name)
+
+    @mute_logger("odoo.models.unlink")
+    def test_add_multiple_lines(self):
+        account = self.non_current_assets_account
+        reconcile_account = self.env["account.account.reconcile"].search(
+            [("account_id", "=", account.id)]
+        )
+        lines = (self.move_1 + self.move_2 + self.move_3).line_ids.filtered(
+            lambda r: r.account_id == account
+        )
+        reconcile_account.add_multiple_lines([("id", "in", lines.ids)])
+        self.assertEqual(
+            sorted(reconcile_account.reconcile_data_info["counterparts"]),
+            sorted(lines.ids),
+        )
+        self.assertEqual(len(reconcile_account.reconcile_data_info["data"]), 3)
+        reconcile_account.add_multiple_lines([("id", "in", lines.ids)])
+        self.assertEqual(
+            len(reconcile_account.reconcile_data_info["counterparts"]), 3
+        )
+        reconcile_account.reconcile()
+        self.assertTrue(all(lines.mapped("reconciled")))
+
     def test_clean_reconcile(self):
         account = self.non_current_assets_account
         reconcile_account = self.env["account.account.reconcile"].search(
@@ -185,6 +214,34 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         reconcile_account.clean_reconcile()
         self.assertFalse(reconcile_account.reconcile_data_info.get("counterparts"))
 
+    def test_gc_reconcile_data(self):
+        reconcile_account = self.env["account.account.reconcile"].search(
+            [("account_id", "=", self.non_current_assets_account.id)]
+        )
+        last_line = self.env["account.move.line"].search([], order="id desc", limit=1)
+        reconcile_data = self.env["account.account.reconcile.data"].sudo()
+        valid, stale, old = reconcile_data.create(
+            [
+                {"user_id": self.env.user.id, "reconcile_id": reconcile_account.id},
+                {"user_id": self.env.user.id, "reconcile_id": last_line.id + 1},
+                {
+                    "user_id": self.env.ref("base.user_root").id,
+                    "reconcile_id": reconcile_account.id,
+                },
+            ]
+        )
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE account_account_reconcile_data "
+            "SET write_date = NOW() - INTERVAL '8 days' WHERE id = %s",
+            [old.id],
+        )
+        self.env.invalidate_all()
+        reconcile_data._gc_reconcile_data()
+        self.assertTrue(valid.exists())
+        self.assertFalse(stale.exists())
+        self.assertFalse(old.exists())
+
     def test_cannot_reconcile(self):
         """
         There is not enough records to reconcile for this account
@@ -1,4 +1,5 @@
 import time
+from datetime import date
 
 from odoo import Command
 from odoo.tests import Form, tagged
@@ -641,6 +642,84 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         )
         self.assertTrue(bank_stmt_line.is_reconciled)
 
+    def test_reconcile_hints_on_create(self):
+        """
+        The invoice given as hint by the importer is matched, even if another
+        invoice of the same partner and amount is open.
+        """
+        self.invoice_matching_models.active = True
+        inv1 = self.create_invoice(currency_id=self.currency_euro_id)
+        inv2 = self.create_invoice(currency_id=self.currency_euro_id)
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "payment_ref": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 50,
+                "date": time.strftime("%Y-07-15"),
+                "reconcile_hints": {
+                    "partner_id": inv2.partner_id.id,
+                    "invoice_reference": inv2.name,
+                },
+            }
+        )
+        self.assertTrue(bank_stmt_line.is_reconciled)
+        self.assertEqual(inv2.amount_residual, 0)
+        self.assertEqual(inv1.amount_residual, 50)
+
+    def test_reconcile_hints_kept(self):
+        """
+        The hints of a line that is not reconciled on import are kept for the
+        later matchings.
+        """
+        inv = self.create_invoice(currency_id=self.currency_euro_id)
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "payment_ref": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 50,
+                "date": time.strftime("%Y-07-15"),
+                "reconcile_hints": {"partner_id": inv.partner_id.id},
+            }
+        )
+        self.assertFalse(bank_stmt_line.is_reconciled)
+        self.assertEqual(
+            bank_stmt_line.reconcile_hints, {"partner_id": inv.partner_id.id}
+        )
+        self.assertEqual(bank_stmt_line._retrieve_partner(), inv.partner_id)
+
+    def test_reconcile_model_ids_cache(self):
+        reconcile_model = self.env["account.reconcile.model"]
+        model_ids = reconcile_model._get_reconcile_model_ids(
+            self.company.id, self.bank_journal_euro.id, auto_only=True
+        )
+        rule = reconcile_model.create(
+            {
+                "name": "write-off model suggestion",
+                "rule_type": "writeoff_suggestion",
+                "auto_reconcile": True,
+                "line_ids": [
+                    Command.create({"account_id": self.current_assets_account.id})
+                ],
+            }
+        )
+        model_ids = reconcile_model._get_reconcile_model_ids(
+            self.company.id, self.bank_journal_euro.id, auto_only=True
+        )
+        self.assertIn(rule.id, model_ids)
+        rule.match_journal_ids = self.bank_journal_usd
+        model_ids = reconcile_model._get_reconcile_model_ids(
+            self.company.id, self.bank_journal_euro.id, auto_only=True
+        )
+        self.assertNotIn(rule.id, model_ids)
+        rule.write({"match_journal_ids": False, "active": False})
+        all_reconcile_models = reconcile_model.with_context(active_test=False)
+        model_ids = all_reconcile_models._get_reconcile_model_ids(
+            self.company.id, self.bank_journal_euro.id, auto_only=True
+        )
+        self.assertNotIn(rule.id, model_ids)
+
     @mute_logger("odoo.models.unlink")
     def test_reconcile_invoice_keep(self):
         """
@@ -1019,6 +1098,42 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
             f.manual_model_id = self.rule
             self.assertTrue(f.can_reconcile)
 
+    def test_add_multiple_lines(self):
+        inv1 = self.create_invoice(invoice_amount=60)
+        inv2 = self.create_invoice(invoice_amount=60)
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        receivable_lines = (inv1 + inv2).line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        bank_stmt_line.add_multiple_lines([("id", "in", receivable_lines.ids)])
+        self.assertEqual(
+            set(bank_stmt_line.reconcile_data_info["counterparts"]),
+            set(receivable_lines.ids),
+        )
+        self.assertTrue(bank_stmt_line.can_reconcile)
+        self.assertEqual(
+            sorted(
+                line["amount"]
+                for line in bank_stmt_line.reconcile_data_info["data"]
+                if line["kind"] == "other"
+            ),
+            [-60, -40],
+        )
+        # Adding the same lines again keeps the current selection
+        bank_stmt_line.add_multiple_lines([("id", "in", receivable_lines.ids)])
+        self.assertEqual(
+            len(bank_stmt_line.reconcile_data_info["counterparts"]), 2
+        )
+        bank_stmt_line.reconcile_bank_line()
+        self.assertTrue(bank_stmt_line.is_reconciled)
+
     # Testing actions
 
     def test_bank_statement_rainbowman(self):
@@ -1062,6 +1177,135 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
             self.env[move_action["res_model"]].browse(move_action["res_id"]),
         )
 
+    def test_bank_statement_line_import_lines(self):
+        vals_iterable = (
+            {
+                "name": "importLine",
+                "payment_ref": f"import-{index}",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 10 + index,
+                "date": time.strftime("%Y-07-15"),
+            }
+            for index in range(5)
+        )
+        count = self.acc_bank_stmt_line_model.import_lines(vals_iterable, chunk_size=2)
+        self.assertEqual(count, 5)
+        st_lines = self.acc_bank_stmt_line_model.search(
+            [("payment_ref", "=like", "import-%")]
+        )
+        self.assertEqual(len(st_lines), 5)
+        self.assertEqual(set(st_lines.move_id.mapped("state")), {"posted"})
+
+    def test_bank_statement_line_partner_change(self):
+        st_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "testLine",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": amount,
+                    "date": time.strftime("%Y-07-15"),
+                }
+                for amount in (100, 200, 300)
+            ]
+        )
+        st_lines.write({"partner_id": self.partner_agrolait_id})
+        self.assertEqual(st_lines.move_id.partner_id, self.partner_agrolait)
+        self.assertEqual(st_lines.move_id.line_ids.partner_id, self.partner_agrolait)
+        self.assertEqual(
+            st_lines[0].reconcile_data_info["data"][0]["partner_id"][0],
+            self.partner_agrolait_id,
+        )
+
+    def test_bank_statement_line_reconcile_aggregate(self):
+        st_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 100,
+                "date": "2024-07-17",
+            }
+        )
+        lang = self.env["res.lang"]._lang_get(self.env.user.lang)
+        lang.week_start = "1"
+        for reconcile_aggregate, bucket in (
+            ("day", date(2024, 7, 17)),
+            ("week", date(2024, 7, 15)),
+            ("month", date(2024, 7, 1)),
+        ):
+            self.bank_journal_euro.reconcile_aggregate = reconcile_aggregate
+            st_line.invalidate_recordset(["aggregate_id", "aggregate_name"])
+            self.assertEqual(st_line.aggregate_id, bucket.toordinal())
+            self.assertEqual(
+                st_line.aggregate_name, bucket.strftime(lang.date_format)
+            )
+
+    def test_bank_statement_line_reconcile_aggregate_totals(self):
+        self.bank_journal_euro.reconcile_aggregate = "month"
+        st_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "testLine",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": amount,
+                    "date": line_date,
+                }
+                for amount, line_date in (
+                    (100, "2024-07-17"),
+                    (50, "2024-07-01"),
+                    (25, "2024-06-30"),
+                )
+            ]
+        )
+        totals = self.acc_bank_stmt_line_model.get_reconcile_aggregate_totals(
+            self.bank_journal_euro.id, [("id", "in", st_lines.ids)]
+        )
+        self.assertEqual(
+            [(total["id"], total["count"], total["amount"]) for total in totals],
+            [
+                (date(2024, 7, 1).toordinal(), 2, 150),
+                (date(2024, 6, 1).toordinal(), 1, 25),
+            ],
+        )
+        self.assertEqual(totals[0]["unreconciled_count"], 2)
+
+    def test_bank_statement_line_reconcile_cards(self):
+        self.bank_journal_euro.reconcile_aggregate = "month"
+        st_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "testLine",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": amount,
+                    "date": line_date,
+                }
+                for amount, line_date in (
+                    (100, "2024-07-17"),
+                    (50, "2024-07-01"),
+                    (25, "2024-06-30"),
+                )
+            ]
+        )
+        domain = [("id", "in", st_lines.ids)]
+        page = self.acc_bank_stmt_line_model.get_reconcile_cards(
+            domain, {"amount": {}}, limit=2
+        )
+        self.assertEqual([record["amount"] for record in page["records"]], [100, 50])
+        self.assertEqual(page["length"], 3)
+        self.assertEqual(
+            [(total["id"], total["count"]) for total in page["aggregates"]],
+            [(date(2024, 7, 1).toordinal(), 2)],
+        )
+        self.assertTrue(page["next_cursor"])
+        page = self.acc_bank_stmt_line_model.get_reconcile_cards(
+            domain, {"amount": {}}, cursor=page["next_cursor"], limit=2
+        )
+        self.assertEqual([record["amount"] for record in page["records"]], [25])
+        self.assertEqual(
+            [(total["id"], total["amount"]) for total in page["aggregates"]],
+            [(date(2024, 6, 1).toordinal(), 25)],
+        )
+        self.assertFalse(page["next_cursor"])
+
     # Testing filters
 
     def test_filter_partner(self):
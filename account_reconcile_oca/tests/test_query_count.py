@@ -0,0 +1,140 @@
+from odoo.tests import tagged
+
+from .common import TestReconcileLedgerCommon
+
+
+@tagged("post_install", "-at_install")
+class TestReconcileQueryCount(TestReconcileLedgerCommon):
+    """Check that the number of queries of the reconciliation operations does
+    not grow with the number of records they handle.
+
+    Each operation is measured on one record and on several ones, and the
+    extra queries per additional record must stay under the budget of the
+    operation. A loop running queries for every record exceeds it.
+    """
+
+    # Maximum number of extra queries per additional record: none of the
+    # operations may depend on the number of records. The counterpart lines
+    # are created and reconciled in batch when validating, and their
+    # reconciliations removed in batch when unreconciling.
+    query_budgets = {
+        "open_widget": 0,
+        "add_counterpart": 0,
+        "validate": 0,
+        "unreconcile": 0,
+        "account_reconcile_list": 0,
+    }
+    # Maximum growth of the number of queries per statement line on auto
+    # reconciliation, between a small statement and a large one
+    auto_reconcile_growth = 1.25
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.invoice_partner = cls.env["res.partner"].create(
+            {"name": "Query Count Partner", "is_company": True}
+        )
+
+    def _count_queries(self, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        query_count = self.cr.sql_log_count
+        func()
+        self.env.flush_all()
+        return self.cr.sql_log_count - query_count
+
+    def assertQueryBudget(self, operation, single_count, multi_count, extra_records):
+        budget = self.query_budgets[operation] * extra_records
+        self.assertLessEqual(
+            multi_count - single_count,
+            budget,
+            f"{operation}: {multi_count} queries for {extra_records + 1} records "
+            f"against {single_count} for one record, budget of {budget} extra "
+            "queries exceeded",
+        )
+
+    def _create_st_line_with_invoices(self, invoice_count):
+        invoices = self.env["account.move"]
+        for _index in range(invoice_count):
+            invoices |= self._create_invoice(
+                invoice_amount=10,
+                partner_id=self.invoice_partner.id,
+                auto_validate=True,
+            )
+        st_line = self.env["account.bank.statement.line"].create(
+            {
+                "journal_id": self.bank_journal_euro.id,
+                "date": invoices[0].date,
+                "payment_ref": "Query count",
+                "partner_id": self.invoice_partner.id,
+                "amount": 10 * invoice_count,
+            }
+        )
+        receivables = invoices.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        return st_line, receivables
+
+    def _measure_widget(self, invoice_count):
+        st_line, receivables = self._create_st_line_with_invoices(invoice_count)
+        # Open a line without stored data: the reconcile models propose the
+        # open invoices of the partner
+        st_line.reconcile_data = False
+        counts = {
+            "open_widget": self._count_queries(lambda: st_line.reconcile_data_info)
+        }
+        self.assertFalse(st_line.is_reconciled)
+        st_line.clean_reconcile()
+        counts["add_counterpart"] = self._count_queries(
+            lambda: st_line.add_multiple_lines([("id", "in", receivables.ids)])
+        )
+        self.assertTrue(st_line.can_reconcile)
+        counts["validate"] = self._count_queries(st_line.reconcile_bank_line)
+        self.assertTrue(st_line.is_reconciled)
+        counts["unreconcile"] = self._count_queries(st_line.unreconcile_bank_line)
+        self.assertFalse(st_line.is_reconciled)
+        return counts
+
+    def test_widget_query_count(self):
+        single_counts = self._measure_widget(1)
+        multi_counts = self._measure_widget(10)
+        for operation in ("open_widget", "add_counterpart", "validate", "unreconcile"):
+            self.assertQueryBudget(
+                operation, single_counts[operation], multi_counts[operation], 9
+            )
+
+    def test_auto_reconcile_query_count(self):
+        *_ledger, small_st_lines = self._generate_ledger(
+            invoice_count=10, line_count=10
+        )
+        *_ledger, large_st_lines = self._generate_ledger(
+            invoice_count=100, line_count=100
+        )
+        small_count = self._count_queries(small_st_lines._auto_reconcile)
+        large_count = self._count_queries(large_st_lines._auto_reconcile)
+        self.assertLessEqual(
+            large_count / len(large_st_lines),
+            small_count / len(small_st_lines) * self.auto_reconcile_growth,
+            f"auto reconcile: {large_count} queries for {len(large_st_lines)} "
+            f"lines against {small_count} for {len(small_st_lines)} lines",
+        )
+
+    def test_account_reconcile_list_query_count(self):
+        partners, _invoices, _st_lines = self._generate_ledger(
+            partner_count=10, invoice_count=10, line_count=0
+        )
+        account_reconcile = self.env["account.account.reconcile"]
+        fnames = ["name", "partner_id", "account_id", "is_reconciled"]
+        single_count = self._count_queries(
+            lambda: account_reconcile.search_read(
+                [("partner_id", "in", partners[:1].ids)], fnames
+            )
+        )
+        multi_count = self._count_queries(
+            lambda: account_reconcile.search_read(
+                [("partner_id", "in", partners.ids)], fnames
+            )
+        )
+        self.assertQueryBudget(
+            "account_reconcile_list", single_count, multi_count, len(partners) - 1
+        )
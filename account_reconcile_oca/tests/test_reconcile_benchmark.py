@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from odoo.tests import tagged
+
+from .common import TestReconcileLedgerCommon
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("post_install", "-at_install", "-standard", "reconcile_benchmark")
+class TestReconcileBenchmark(TestReconcileLedgerCommon):
+    """Measure the reconciliation on synthetic ledgers.
+
+    These tests are not run by default, use the ``reconcile_benchmark`` test
+    tag to run them. The wall time and the number of queries of each
+    operation are logged, per scenario, and written as JSON to the file given
+    by the ``RECONCILE_BENCHMARK_OUTPUT`` environment variable (by default in
+    the temporary directory).
+
+    The number of queries per statement line of each operation must stay
+    under its threshold. When the ``RECONCILE_BENCHMARK_BASELINE`` environment
+    variable gives the JSON output of a previous run, it must also stay under
+    the one of the baseline, with the ``baseline_tolerance`` margin.
+    """
+
+    # Maximum number of queries per statement line of each operation
+    query_thresholds = {
+        "_retrieve_partner": 15,
+        "_apply_rules": 40,
+        "_default_reconcile_data": 60,
+        "reconcile_bank_line": 150,
+        "_auto_reconcile": 150,
+    }
+    baseline_tolerance = 1.1
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.benchmark_results = []
+        cls.benchmark_baseline = {}
+        baseline_path = os.environ.get("RECONCILE_BENCHMARK_BASELINE")
+        if baseline_path:
+            with open(baseline_path) as baseline_file:
+                cls.benchmark_baseline = {
+                    (result["scenario"], result["operation"]): result
+                    for result in json.load(baseline_file)
+                }
+
+    @classmethod
+    def tearDownClass(cls):
+        for result in cls.benchmark_results:
+            _logger.info(
+                "Benchmark %(scenario)s / %(operation)s: %(duration).3fs, "
+                "%(query_count)s queries for %(line_count)s lines",
+                result,
+            )
+        output_path = os.environ.get(
+            "RECONCILE_BENCHMARK_OUTPUT",
+            os.path.join(tempfile.gettempdir(), "account_reconcile_oca_benchmark.json"),
+        )
+        with open(output_path, "w") as output_file:
+            json.dump(cls.benchmark_results, output_file, indent=2)
+        _logger.info("Benchmark results written to %s", output_path)
+        super().tearDownClass()
+
+    @contextmanager
+    def _benchmark(self, scenario, operation, line_count):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        query_count = self.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        result = {
+            "scenario": scenario,
+            "operation": operation,
+            "duration": time.perf_counter() - start,
+            "query_count": self.cr.sql_log_count - query_count,
+            "line_count": line_count,
+        }
+        self.benchmark_results.append(result)
+        self.assertQueryThreshold(result)
+
+    def assertQueryThreshold(self, result):
+        per_line = result["query_count"] / (result["line_count"] or 1)
+        self.assertLessEqual(
+            per_line,
+            self.query_thresholds[result["operation"]],
+            f"{result['scenario']} / {result['operation']}: {per_line:.1f} "
+            "queries per line",
+        )
+        baseline = self.benchmark_baseline.get(
+            (result["scenario"], result["operation"])
+        )
+        if baseline:
+            baseline_per_line = baseline["query_count"] / (baseline["line_count"] or 1)
+            self.assertLessEqual(
+                per_line,
+                baseline_per_line * self.baseline_tolerance,
+                f"{result['scenario']} / {result['operation']}: {per_line:.1f} "
+                f"queries per line against {baseline_per_line:.1f} in the baseline",
+            )
+
+    def _run_scenario(self, scenario, **ledger_params):
+        _partners, _invoices, st_lines = self._generate_ledger(**ledger_params)
+        reconcile_models = self.env["account.reconcile.model"]
+        reconcile_models = reconcile_models.browse(
+            reconcile_models._get_reconcile_model_ids(
+                self.company.id, self.bank_journal_euro.id
+            )
+        )
+        with self._benchmark(scenario, "_retrieve_partner", len(st_lines)):
+            for st_line in st_lines:
+                st_line._retrieve_partner()
+        with self._benchmark(scenario, "_apply_rules", len(st_lines)):
+            for st_line in st_lines:
+                reconcile_models._apply_rules(st_line, st_line._retrieve_partner())
+        with self._benchmark(scenario, "_default_reconcile_data", len(st_lines)):
+            for st_line in st_lines:
+                st_line._default_reconcile_data()
+        half = len(st_lines) // 2
+        with self._benchmark(scenario, "reconcile_bank_line", half):
+            for st_line in st_lines[:half]:
+                if st_line.can_reconcile:
+                    st_line.reconcile_bank_line()
+        with self._benchmark(scenario, "_auto_reconcile", len(st_lines) - half):
+            st_lines[half:]._auto_reconcile()
+        self.assertTrue(any(st_lines.mapped("is_reconciled")))
+
+    def test_benchmark_single_currency(self):
+        self._run_scenario("single_currency", invoice_count=200, line_count=100)
+
+    def test_benchmark_multi_currency(self):
+        self._run_scenario(
+            "multi_currency", invoice_count=200, line_count=100, currency_ratio=0.3
+        )
+
+    def test_benchmark_noisy_labels(self):
+        self._run_scenario(
+            "noisy_labels", invoice_count=200, line_count=100, noise_ratio=0.5
+        )
+
+    def test_benchmark_many_partners(self):
+        self._run_scenario(
+            "many_partners", partner_count=200, invoice_count=400, line_count=100
+        )